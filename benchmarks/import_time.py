@@ -0,0 +1,95 @@
+"""
+Measures the import time of `flet_geolocator` and of its lightweight parts.
+
+Each scenario runs in a fresh interpreter, and the best of `--runs` runs is
+reported: the wall-clock time of the import statement, which covers every
+module it imports after the interpreter startup, and the time spent importing
+flet, as reported by `python -X importtime` (`0` if the scenario didn't
+import it).
+
+Usage:
+    python benchmarks/import_time.py [--runs 5] [--max-ms 50]
+
+With `--max-ms`, the script exits with a non-zero status if a scenario that
+shouldn't import flet takes longer than the given number of milliseconds,
+or imports flet at all.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+# (name, statement, whether the scenario is expected to import flet)
+SCENARIOS = [
+    ("package", "import flet_geolocator", False),
+    ("geodesy", "import flet_geolocator.geodesy", False),
+    ("analytics", "from flet_geolocator.analytics import track_length", False),
+    ("types", "from flet_geolocator import GeolocatorPosition", True),
+    ("geolocator", "from flet_geolocator import Geolocator", True),
+]
+
+# times the statement in the subprocess, printing the elapsed milliseconds
+_TIMER = """\
+import time
+start = time.perf_counter()
+exec({statement!r})
+print((time.perf_counter() - start) * 1000)
+"""
+
+_LINE = re.compile(r"^import time:\s+\d+\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def measure(statement: str) -> tuple[float, float]:
+    """
+    Imports `statement` in a fresh interpreter.
+
+    Returns:
+        The wall-clock time of the statement and the cumulative import time
+        of flet, in milliseconds.
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC), env.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _TIMER.format(statement=statement)],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    flet = 0
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match is not None and match.group(3) == "flet":
+            flet += int(match.group(1))
+    return float(result.stdout), flet / 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'scenario':<12}{'total (ms)':>12}{'flet (ms)':>12}")
+    for name, statement, imports_flet in SCENARIOS:
+        try:
+            total, flet = min(measure(statement) for _ in range(args.runs))
+        except RuntimeError as error:
+            print(f"{name:<12}{'error':>12}  {error}")
+            failed = failed or not imports_flet
+            continue
+        print(f"{name:<12}{total:>12.1f}{flet:>12.1f}")
+        if args.max_ms is not None and not imports_flet:
+            failed = failed or flet > 0 or total > args.max_ms
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,31 @@
-from flet_geolocator.geolocator import Geolocator
-from flet_geolocator.types import (
-    ForegroundNotificationConfiguration,
-    GeolocatorAndroidConfiguration,
-    GeolocatorConfiguration,
-    GeolocatorIosActivityType,
-    GeolocatorIosConfiguration,
-    GeolocatorPermissionStatus,
-    GeolocatorPosition,
-    GeolocatorPositionAccuracy,
-    GeolocatorPositionChangeEvent,
-    GeolocatorWebConfiguration,
-)
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from flet_geolocator.analytics import TrackArrays
+    from flet_geolocator.geolocator import Geolocator
+    from flet_geolocator.map_matching import MapMatcher, RoadGraph
+    from flet_geolocator.reverse_geocoder import ReverseGeocoder
+    from flet_geolocator.track import TrackSegmenter
+    from flet_geolocator.types import (
+        ForegroundNotificationConfiguration,
+        GeolocatorAndroidConfiguration,
+        GeolocatorConfiguration,
+        GeolocatorIosActivityType,
+        GeolocatorIosConfiguration,
+        GeolocatorMatchedPosition,
+        GeolocatorPermissionChangeEvent,
+        GeolocatorPermissionStatus,
+        GeolocatorPlace,
+        GeolocatorPosition,
+        GeolocatorPositionAccuracy,
+        GeolocatorPositionChangeEvent,
+        GeolocatorServiceStatusChangeEvent,
+        GeolocatorStayPoint,
+        GeolocatorSubscription,
+        GeolocatorTrip,
+        GeolocatorWebConfiguration,
+    )
 
 __all__ = [
     "ForegroundNotificationConfiguration",
@@ -19,9 +34,46 @@ __all__ = [
     "GeolocatorConfiguration",
     "GeolocatorIosActivityType",
     "GeolocatorIosConfiguration",
+    "GeolocatorMatchedPosition",
+    "GeolocatorPermissionChangeEvent",
     "GeolocatorPermissionStatus",
+    "GeolocatorPlace",
     "GeolocatorPosition",
     "GeolocatorPositionAccuracy",
     "GeolocatorPositionChangeEvent",
+    "GeolocatorServiceStatusChangeEvent",
+    "GeolocatorStayPoint",
+    "GeolocatorSubscription",
+    "GeolocatorTrip",
     "GeolocatorWebConfiguration",
+    "MapMatcher",
+    "ReverseGeocoder",
+    "RoadGraph",
+    "TrackArrays",
+    "TrackSegmenter",
 ]
+
+# The public names are imported from their modules on first access (PEP 562),
+# so that `import flet_geolocator` stays cheap, and processes that only need
+# `geodesy` or `analytics` never import flet.
+_modules = {
+    "Geolocator": "geolocator",
+    "MapMatcher": "map_matching",
+    "ReverseGeocoder": "reverse_geocoder",
+    "RoadGraph": "map_matching",
+    "TrackArrays": "analytics",
+    "TrackSegmenter": "track",
+}
+
+
+def __getattr__(name: str):
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f"{__name__}.{_modules.get(name, 'types')}")
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
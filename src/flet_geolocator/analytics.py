@@ -0,0 +1,508 @@
+import array
+import datetime
+import math
+import threading
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Optional
+
+from flet_geolocator.geodesy import EARTH_RADIUS, haversine_distance
+
+if TYPE_CHECKING:
+    # imported on first use, so that importing this module stays cheap and
+    # workers running the kernels below don't have to import flet
+    from concurrent.futures import Executor
+    from multiprocessing.context import BaseContext
+    from multiprocessing.shared_memory import SharedMemory
+
+    from flet_geolocator.types import (
+        GeolocatorPosition,
+        GeolocatorStayPoint,
+        GeolocatorTrip,
+    )
+
+__all__ = [
+    "TrackArrays",
+    "configure_executor",
+    "distance_matrix",
+    "distance_matrix_async",
+    "get_executor",
+    "segment_track",
+    "segment_track_async",
+    "shutdown_executor",
+    "simplify_track",
+    "simplify_track_async",
+    "submit",
+    "track_length",
+    "track_length_async",
+]
+
+
+@dataclass
+class TrackArrays:
+    """
+    A track stored as compact columns of doubles.
+
+    Columns are much cheaper to ship to worker processes than lists of
+    [`GeolocatorPosition`][(p).]: they are copied as raw bytes or, with a
+    process pool, placed in shared memory.
+    """
+
+    latitudes: Sequence[float] = field(default_factory=lambda: array.array("d"))
+    """
+    The latitudes of the fixes, in degrees.
+    """
+
+    longitudes: Sequence[float] = field(default_factory=lambda: array.array("d"))
+    """
+    The longitudes of the fixes, in degrees.
+    """
+
+    timestamps: Sequence[float] = field(default_factory=lambda: array.array("d"))
+    """
+    The times of the fixes, as POSIX timestamps in seconds.
+
+    `NaN` for fixes without a timestamp.
+    """
+
+    def __post_init__(self):
+        if not len(self.latitudes) == len(self.longitudes) == len(self.timestamps):
+            raise ValueError("all columns of a track must have the same length")
+
+    def __len__(self) -> int:
+        return len(self.latitudes)
+
+    @classmethod
+    def from_positions(cls, positions: Iterable["GeolocatorPosition"]) -> "TrackArrays":
+        """
+        Converts positions to columns.
+
+        Args:
+            positions: The positions of the track, in chronological order.
+
+        Returns:
+            The columnar track.
+        """
+        track = cls()
+        for position in positions:
+            track.latitudes.append(position.latitude)
+            track.longitudes.append(position.longitude)
+            track.timestamps.append(
+                position.timestamp.timestamp()
+                if position.timestamp is not None
+                else math.nan
+            )
+        return track
+
+    def select(self, indices: Iterable[int]) -> "TrackArrays":
+        """
+        Returns a new track made of the fixes at the given indices.
+
+        Args:
+            indices: The indices of the fixes to keep.
+        """
+        track = TrackArrays()
+        for i in indices:
+            track.latitudes.append(self.latitudes[i])
+            track.longitudes.append(self.longitudes[i])
+            track.timestamps.append(self.timestamps[i])
+        return track
+
+
+# Executor
+
+
+_executor: Optional["Executor"] = None
+_owns_executor = False
+_max_workers: Optional[int] = None
+_mp_context: Any = None
+_use_shared_memory = True
+_executor_lock = threading.Lock()
+
+
+def configure_executor(
+    executor: Optional["Executor"] = None,
+    *,
+    max_workers: Optional[int] = None,
+    mp_context: Any = None,
+    use_shared_memory: bool = True,
+):
+    """
+    Configures the executor used by the `*_async` functions of this module.
+
+    By default, a [`ProcessPoolExecutor`][concurrent.futures.ProcessPoolExecutor]
+    is created on first use, so CPU-bound work does not block the asyncio
+    event loop serving Flet sessions.
+    A previously created default executor is shut down.
+
+    Args:
+        executor: The executor to use. If `None`, a process pool is created on
+            first use.
+        max_workers: The number of worker processes of the default process pool.
+            Defaults to the number of processors.
+        mp_context: The multiprocessing context of the default process pool.
+            Defaults to the `"forkserver"` start method where available, and
+            `"spawn"` otherwise, as forking the multi-threaded process serving
+            Flet sessions may deadlock. Both import the main module of the app
+            in the workers, so it must guard starting the app with
+            `if __name__ == "__main__":`.
+        use_shared_memory: Whether tracks are passed to process pools through
+            shared memory rather than copied into each task.
+    """
+    global _executor, _owns_executor, _max_workers, _mp_context, _use_shared_memory
+    with _executor_lock:
+        if _owns_executor and _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = executor
+        _owns_executor = False
+        _max_workers = max_workers
+        _mp_context = mp_context
+        _use_shared_memory = use_shared_memory
+
+
+def get_executor() -> "Executor":
+    """
+    Returns the executor used by the `*_async` functions of this module,
+    creating the default process pool if needed.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    global _executor, _owns_executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=_max_workers,
+                mp_context=_mp_context or _default_mp_context(),
+            )
+            _owns_executor = True
+        return _executor
+
+
+def _default_mp_context() -> "BaseContext":
+    import multiprocessing
+
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context(
+        "forkserver" if "forkserver" in methods else "spawn"
+    )
+
+
+def shutdown_executor(wait: bool = True):
+    """
+    Shuts down the default process pool, if it was created.
+
+    An executor passed to [`configure_executor`][..] is left running.
+
+    Args:
+        wait: Whether to wait for pending tasks to complete.
+    """
+    global _executor, _owns_executor
+    with _executor_lock:
+        if _owns_executor and _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
+        _owns_executor = False
+
+
+@dataclass
+class _SharedTrack:
+    name: str
+    length: int
+
+    def attach(self, shm: "SharedMemory") -> tuple[TrackArrays, list[memoryview]]:
+        base = shm.buf.cast("d")
+        n = self.length
+        views = [base[0:n], base[n : 2 * n], base[2 * n : 3 * n]]
+        return TrackArrays(*views), [*views, base]
+
+
+def _share(track: TrackArrays) -> tuple["SharedMemory", _SharedTrack]:
+    from multiprocessing.shared_memory import SharedMemory
+
+    n = len(track)
+    shm = SharedMemory(create=True, size=max(1, 3 * n) * 8)
+    base = shm.buf.cast("d")
+    try:
+        for offset, column in enumerate(
+            (track.latitudes, track.longitudes, track.timestamps)
+        ):
+            base[offset * n : (offset + 1) * n] = array.array("d", column)
+    finally:
+        base.release()
+    return shm, _SharedTrack(shm.name, n)
+
+
+def _run_shared(fn: Callable, shared_tracks: list[_SharedTrack], args: tuple):
+    from multiprocessing.shared_memory import SharedMemory
+
+    blocks = []
+    views = []
+    try:
+        tracks = []
+        for shared in shared_tracks:
+            shm = SharedMemory(name=shared.name)
+            blocks.append(shm)
+            track, track_views = shared.attach(shm)
+            tracks.append(track)
+            views.extend(track_views)
+        return fn(*tracks, *args)
+    finally:
+        for view in views:
+            view.release()
+        for shm in blocks:
+            shm.close()
+
+
+async def submit(fn: Callable, tracks: list[TrackArrays], *args):
+    """
+    Runs `fn(*tracks, *args)` in the [configured][..get_executor] executor.
+
+    This is the helper behind the `*_async` functions of this package, for
+    modules implementing their own CPU-bound kernels. With a process pool,
+    `tracks` are passed through shared memory, as read-only
+    [`TrackArrays`][(p).] backed by memory views that are only valid during
+    the call, and `fn` and `args` must be picklable.
+
+    Args:
+        fn: The function to run, usually a module-level kernel.
+        tracks: The tracks passed as the first arguments of `fn`.
+        *args: The remaining arguments of `fn`.
+
+    Returns:
+        The result of `fn`.
+    """
+    import asyncio
+    from concurrent.futures import ProcessPoolExecutor
+
+    executor = get_executor()
+    loop = asyncio.get_running_loop()
+    if not (_use_shared_memory and isinstance(executor, ProcessPoolExecutor)):
+        return await loop.run_in_executor(executor, fn, *tracks, *args)
+
+    blocks = []
+    try:
+        shared_tracks = []
+        for track in tracks:
+            shm, shared = _share(track)
+            blocks.append(shm)
+            shared_tracks.append(shared)
+        return await loop.run_in_executor(
+            executor, _run_shared, fn, shared_tracks, args
+        )
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+
+# Kernels
+
+
+def _track_length(track: TrackArrays) -> float:
+    lat, lon = track.latitudes, track.longitudes
+    return math.fsum(
+        haversine_distance(lat[i - 1], lon[i - 1], lat[i], lon[i])
+        for i in range(1, len(lat))
+    )
+
+
+def _distance_matrix(a: TrackArrays, b: Optional[TrackArrays]) -> array.array:
+    if b is None:
+        b = a
+    result = array.array("d", bytes(8 * len(a) * len(b)))
+    k = 0
+    for i in range(len(a)):
+        lat, lon = a.latitudes[i], a.longitudes[i]
+        for j in range(len(b)):
+            result[k] = haversine_distance(lat, lon, b.latitudes[j], b.longitudes[j])
+            k += 1
+    return result
+
+
+def _simplify_indices(track: TrackArrays, tolerance: float) -> array.array:
+    n = len(track)
+    if n < 3:
+        return array.array("q", range(n))
+    lat, lon = track.latitudes, track.longitudes
+    keep = bytearray(n)
+    keep[0] = keep[n - 1] = 1
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        cos_lat = math.cos(math.radians(lat[first]))
+        # project onto a local plane centered on the first fix, in meters
+        bx = math.radians(lon[last] - lon[first]) * cos_lat * EARTH_RADIUS
+        by = math.radians(lat[last] - lat[first]) * EARTH_RADIUS
+        length_sq = bx * bx + by * by
+        max_distance = -1.0
+        index = first
+        for i in range(first + 1, last):
+            px = math.radians(lon[i] - lon[first]) * cos_lat * EARTH_RADIUS
+            py = math.radians(lat[i] - lat[first]) * EARTH_RADIUS
+            t = (
+                max(0.0, min(1.0, (px * bx + py * by) / length_sq))
+                if length_sq
+                else 0.0
+            )
+            distance = math.hypot(px - t * bx, py - t * by)
+            if distance > max_distance:
+                max_distance, index = distance, i
+        if max_distance > tolerance:
+            keep[index] = 1
+            stack.append((first, index))
+            stack.append((index, last))
+    return array.array("q", (i for i in range(n) if keep[i]))
+
+
+def _segment_track(
+    track: TrackArrays,
+    radius: float,
+    min_duration: datetime.timedelta,
+    min_exit_fixes: int,
+) -> tuple[list["GeolocatorStayPoint"], list["GeolocatorTrip"]]:
+    from flet_geolocator.track import TrackSegmenter
+
+    stays = []
+    trips = []
+    segmenter = TrackSegmenter(
+        radius=radius,
+        min_duration=min_duration,
+        min_exit_fixes=min_exit_fixes,
+        on_stay_end=stays.append,
+        on_trip_end=trips.append,
+    )
+    for i in range(len(track)):
+        timestamp = track.timestamps[i]
+        if math.isnan(timestamp):
+            raise ValueError("all fixes of the track must have a timestamp")
+        segmenter.add_coordinates(
+            track.latitudes[i],
+            track.longitudes[i],
+            datetime.datetime.fromtimestamp(timestamp, tz=datetime.timezone.utc),
+        )
+    segmenter.finish()
+    return stays, trips
+
+
+# Public API
+
+
+def track_length(track: TrackArrays) -> float:
+    """
+    Calculates the length of a track, in meters.
+
+    Args:
+        track: The track.
+
+    Returns:
+        The sum of the distances between consecutive fixes, in meters.
+    """
+    return _track_length(track)
+
+
+async def track_length_async(track: TrackArrays) -> float:
+    """
+    Same as [`track_length`][..], but runs in the [configured][..get_executor]
+    executor.
+    """
+    return await submit(_track_length, [track])
+
+
+def distance_matrix(
+    a: TrackArrays, b: Optional[TrackArrays] = None
+) -> list[array.array]:
+    """
+    Calculates the distances between every fix of `a` and every fix of `b`.
+
+    Args:
+        a: The first set of fixes.
+        b: The second set of fixes. Defaults to `a`.
+
+    Returns:
+        One row of distances, in meters, per fix of `a`.
+    """
+    return _rows(_distance_matrix(a, b), len(a))
+
+
+async def distance_matrix_async(
+    a: TrackArrays, b: Optional[TrackArrays] = None
+) -> list[array.array]:
+    """
+    Same as [`distance_matrix`][..], but runs in the
+    [configured][..get_executor] executor.
+    """
+    if b is None:
+        matrix = await submit(_distance_matrix, [a], None)
+    else:
+        matrix = await submit(_distance_matrix, [a, b])
+    return _rows(matrix, len(a))
+
+
+def simplify_track(track: TrackArrays, tolerance: float) -> TrackArrays:
+    """
+    Simplifies a track with the
+    [Ramer-Douglas-Peucker](https://en.wikipedia.org/wiki/Ramer%E2%80%93Douglas%E2%80%93Peucker_algorithm)
+    algorithm.
+
+    Args:
+        track: The track to simplify.
+        tolerance: The maximum distance, in meters, between a dropped fix
+            and the simplified track.
+
+    Returns:
+        A new track made of the retained fixes.
+    """
+    return track.select(_simplify_indices(track, tolerance))
+
+
+async def simplify_track_async(track: TrackArrays, tolerance: float) -> TrackArrays:
+    """
+    Same as [`simplify_track`][..], but runs in the
+    [configured][..get_executor] executor.
+    """
+    return track.select(await submit(_simplify_indices, [track], tolerance))
+
+
+def segment_track(
+    track: TrackArrays,
+    radius: float = 100,
+    min_duration: datetime.timedelta = datetime.timedelta(minutes=5),
+    min_exit_fixes: int = 3,
+) -> tuple[list["GeolocatorStayPoint"], list["GeolocatorTrip"]]:
+    """
+    Splits a stored track into stay points and trips, using a
+    [`TrackSegmenter`][(p).].
+
+    Timestamps of the results are timezone-aware, in UTC.
+
+    Args:
+        track: The track to split. All fixes must have a timestamp.
+        radius: See [`TrackSegmenter`][(p).].
+        min_duration: See [`TrackSegmenter`][(p).].
+        min_exit_fixes: See [`TrackSegmenter`][(p).].
+
+    Returns:
+        The stay points and the trips of the track.
+
+    Raises:
+        ValueError: If a fix of the track has no timestamp.
+    """
+    return _segment_track(track, radius, min_duration, min_exit_fixes)
+
+
+async def segment_track_async(
+    track: TrackArrays,
+    radius: float = 100,
+    min_duration: datetime.timedelta = datetime.timedelta(minutes=5),
+    min_exit_fixes: int = 3,
+) -> tuple[list["GeolocatorStayPoint"], list["GeolocatorTrip"]]:
+    """
+    Same as [`segment_track`][..], but runs in the
+    [configured][..get_executor] executor.
+    """
+    return await submit(_segment_track, [track], radius, min_duration, min_exit_fixes)
+
+
+def _rows(matrix: array.array, rows: int) -> list[array.array]:
+    columns = len(matrix) // rows if rows else 0
+    return [matrix[i * columns : (i + 1) * columns] for i in range(rows)]
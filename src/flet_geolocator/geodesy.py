@@ -0,0 +1,284 @@
+import math
+from collections.abc import Callable, Hashable, Iterator
+from typing import Generic, Optional, TypeVar
+
+__all__ = [
+    "EARTH_RADIUS",
+    "GridIndex",
+    "decode_geohash",
+    "encode_geohash",
+    "haversine_distance",
+]
+
+T = TypeVar("T", bound=Hashable)
+
+EARTH_RADIUS = 6378137.0
+"""
+The equatorial radius of the Earth in meters, as used by the native
+`distanceBetween` implementation of the geolocator plugin.
+"""
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+_GEOHASH_INDEX = {c: i for i, c in enumerate(_GEOHASH_ALPHABET)}
+
+
+def haversine_distance(
+    start_latitude: float,
+    start_longitude: float,
+    end_latitude: float,
+    end_longitude: float,
+) -> float:
+    """
+    Calculates the great-circle distance between two coordinates in meters.
+
+    Uses the same formula and Earth radius as
+    [`Geolocator.distance_between`][flet_geolocator.Geolocator.distance_between],
+    but runs locally, without a round-trip to the client.
+
+    Args:
+        start_latitude: The latitude of the starting point, in degrees.
+        start_longitude: The longitude of the starting point, in degrees.
+        end_latitude: The latitude of the ending point, in degrees.
+        end_longitude: The longitude of the ending point, in degrees.
+
+    Returns:
+        The distance between the coordinates in meters.
+    """
+    phi1 = math.radians(start_latitude)
+    phi2 = math.radians(end_latitude)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(end_longitude - start_longitude)
+    a = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = 7) -> str:
+    """
+    Encodes a coordinate as a [geohash](https://en.wikipedia.org/wiki/Geohash).
+
+    Nearby coordinates share a common prefix, so truncating the hash quantizes
+    the coordinate to a cell: a precision of `7` gives cells of
+    about 153m x 153m, `6` about 1.2km x 0.6km.
+
+    Args:
+        latitude: The latitude, in degrees.
+        longitude: The longitude, in degrees.
+        precision: The number of characters of the resulting hash.
+
+    Returns:
+        The geohash of the coordinate.
+
+    Raises:
+        ValueError: If `precision` is not positive.
+    """
+    if precision < 1:
+        raise ValueError("precision must be a positive integer")
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lon_lo = mid
+            else:
+                bits <<= 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_lo = mid
+            else:
+                bits <<= 1
+                lat_hi = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def decode_geohash(geohash: str) -> tuple[float, float]:
+    """
+    Decodes a [geohash](https://en.wikipedia.org/wiki/Geohash) to the center
+    of its cell.
+
+    Args:
+        geohash: The geohash to decode.
+
+    Returns:
+        A `(latitude, longitude)` tuple, in degrees.
+
+    Raises:
+        ValueError: If `geohash` is empty or contains invalid characters.
+    """
+    if not geohash:
+        raise ValueError("geohash must not be empty")
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    even = True
+    for c in geohash.lower():
+        try:
+            value = _GEOHASH_INDEX[c]
+        except KeyError:
+            raise ValueError(f"invalid geohash character: {c!r}") from None
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lon_lo + lon_hi) / 2
+                if bit:
+                    lon_lo = mid
+                else:
+                    lon_hi = mid
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                if bit:
+                    lat_lo = mid
+                else:
+                    lat_hi = mid
+            even = not even
+    return (lat_lo + lat_hi) / 2, (lon_lo + lon_hi) / 2
+
+
+class GridIndex(Generic[T]):
+    """
+    A spatial index that buckets items into a regular latitude/longitude grid.
+
+    Items are registered with their bounding box, and queries return every item
+    whose box overlaps the box around a search circle, so callers are expected
+    to filter the results with an exact distance.
+    The grid wraps around the antimeridian.
+
+    Args:
+        cell_size: The size of a grid cell, in degrees.
+    """
+
+    def __init__(self, cell_size: float = 0.1):
+        if cell_size <= 0 or cell_size > 180:
+            raise ValueError("cell_size must be in the range (0, 180]")
+        self.cell_size = cell_size
+        self._columns = max(1, math.ceil(360 / cell_size))
+        self._rows = max(1, math.ceil(180 / cell_size))
+        self._cells: dict[tuple[int, int], list[T]] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _row(self, latitude: float) -> int:
+        return min(self._rows - 1, max(0, int((latitude + 90) // self.cell_size)))
+
+    def _column_range(self, min_longitude: float, max_longitude: float) -> range:
+        if max_longitude < min_longitude:
+            max_longitude += 360
+        if max_longitude - min_longitude >= 360:
+            return range(self._columns)
+        first = int((min_longitude + 180) // self.cell_size)
+        last = int((max_longitude + 180) // self.cell_size)
+        return range(first, last + 1)
+
+    def insert(
+        self,
+        item: T,
+        min_latitude: float,
+        min_longitude: float,
+        max_latitude: Optional[float] = None,
+        max_longitude: Optional[float] = None,
+    ):
+        """
+        Registers an item covering the given bounding box.
+
+        Args:
+            item: The item to register.
+            min_latitude: The southern edge of the item, in degrees.
+            min_longitude: The western edge of the item, in degrees.
+            max_latitude: The northern edge of the item, in degrees.
+                Defaults to `min_latitude`, i.e. a point.
+            max_longitude: The eastern edge of the item, in degrees.
+                Defaults to `min_longitude`, i.e. a point.
+        """
+        if max_latitude is None:
+            max_latitude = min_latitude
+        if max_longitude is None:
+            max_longitude = min_longitude
+        for row in range(self._row(min_latitude), self._row(max_latitude) + 1):
+            for column in self._column_range(min_longitude, max_longitude):
+                key = (row, column % self._columns)
+                self._cells.setdefault(key, []).append(item)
+        self._size += 1
+
+    def query(self, latitude: float, longitude: float, radius: float) -> Iterator[T]:
+        """
+        Yields every item that may lie within `radius` of the given coordinate.
+
+        Each item is yielded at most once.
+
+        Args:
+            latitude: The latitude of the search center, in degrees.
+            longitude: The longitude of the search center, in degrees.
+            radius: The search radius, in meters.
+        """
+        d_lat = math.degrees(radius / EARTH_RADIUS)
+        if abs(latitude) + d_lat >= 90:
+            d_lon = 360.0
+        else:
+            d_lon = d_lat / math.cos(math.radians(abs(latitude) + d_lat))
+        seen = set()
+        rows = range(self._row(latitude - d_lat), self._row(latitude + d_lat) + 1)
+        for row in rows:
+            for column in self._column_range(longitude - d_lon, longitude + d_lon):
+                for item in self._cells.get((row, column % self._columns), ()):
+                    if item not in seen:
+                        seen.add(item)
+                        yield item
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        distance: Callable[[T], float],
+        max_distance: Optional[float] = None,
+    ) -> Optional[tuple[T, float]]:
+        """
+        Finds the item closest to the given coordinate.
+
+        The search starts with a single cell and doubles its radius until a
+        match is guaranteed to be the closest one.
+
+        Args:
+            latitude: The latitude of the search center, in degrees.
+            longitude: The longitude of the search center, in degrees.
+            distance: A function returning the distance, in meters, from the
+                search center to an item.
+            max_distance: The maximum distance, in meters, of a match.
+                If `None`, the whole grid is searched if necessary.
+
+        Returns:
+            An `(item, distance)` tuple, or `None` if no item was found.
+        """
+        if not self._size:
+            return None
+        limit = math.pi * EARTH_RADIUS if max_distance is None else max_distance
+        radius = min(limit, math.radians(self.cell_size) * EARTH_RADIUS)
+        while True:
+            best = None
+            best_distance = math.inf
+            for item in self.query(latitude, longitude, radius):
+                d = distance(item)
+                if d < best_distance:
+                    best, best_distance = item, d
+            if best_distance <= radius or radius >= limit:
+                if best_distance <= limit:
+                    return best, best_distance
+                return None
+            radius = min(limit, radius * 2)
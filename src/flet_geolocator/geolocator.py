@@ -1,13 +1,21 @@
-from dataclasses import field
-from typing import Optional
+import asyncio
+import inspect
+from dataclasses import field, fields, replace
+from typing import Any, Callable, Optional
 
 import flet as ft
+from flet.controls.context import _context_page, context
+from flet.utils.from_dict import from_dict
+from flet.utils.object_model import get_param_count
 
 from flet_geolocator.types import (
     GeolocatorConfiguration,
+    GeolocatorPermissionChangeEvent,
     GeolocatorPermissionStatus,
     GeolocatorPosition,
     GeolocatorPositionChangeEvent,
+    GeolocatorServiceStatusChangeEvent,
+    GeolocatorSubscription,
 )
 
 __all__ = ["Geolocator"]
@@ -27,11 +35,52 @@ class Geolocator(ft.Service):
     Some additional configuration.
     """
 
+    delta_updates: bool = False
+    """
+    Whether position changes are sent by the client as deltas.
+
+    When `True`, each fix of the position stream only carries the fields that
+    changed since the previous fix, roughly halving the payload of
+    high-frequency tracking. The full position is rebuilt before
+    [`on_position_change`][..] fires, so handlers and the [`position`][..]
+    property always see complete positions.
+
+    Deltas are relative to the previous fix sent, which is not acknowledged
+    by Python. So that a lost event cannot leave the position stale, the
+    client sends a full position every 10 fixes and at least every
+    30 seconds, as well as after the app is resumed.
+    """
+
     on_position_change: Optional[ft.EventHandler[GeolocatorPositionChangeEvent]] = None
     """
     Fires when the position of the device changes.
     """
 
+    on_service_status_change: Optional[
+        ft.EventHandler[GeolocatorServiceStatusChangeEvent]
+    ] = None
+    """
+    Fires when the location service of the device is enabled or disabled,
+    and once its initial status is known.
+
+    The client listens to the service status stream of the platform,
+    which is not available on web, and checks the status again each time
+    the app is resumed.
+    """
+
+    on_permission_change: Optional[ft.EventHandler[GeolocatorPermissionChangeEvent]] = (
+        None
+    )
+    """
+    Fires when the permission to access the device's location changes,
+    and once the initial permission is known.
+
+    The permission is checked by the client each time the app is resumed,
+    such as after the user returns from the app settings, and whenever it is
+    requested or checked with [`request_permission`][..] or
+    [`get_permission_status`][..].
+    """
+
     on_error: Optional[ft.ControlEventHandler["Geolocator"]] = None
     """
     Fires when an error occurs.
@@ -49,6 +98,184 @@ class Geolocator(ft.Service):
     Starts as `None` and will be updated when the position changes.
     """
 
+    service_enabled: Optional[bool] = field(default=None, init=False)
+    """
+    Whether the location service of the device is enabled. (read-only)
+
+    Starts as `None` and is kept up to date by the client,
+    see [`on_service_status_change`][..].
+    """
+
+    permission_status: Optional[GeolocatorPermissionStatus] = field(
+        default=None, init=False
+    )
+    """
+    The permission the app has been granted to access the device's location.
+    (read-only)
+
+    Starts as `None` and is kept up to date by the client,
+    see [`on_permission_change`][..].
+    """
+
+    subscriptions: list[GeolocatorSubscription] = field(
+        default_factory=list, init=False
+    )
+    """
+    The named position subscriptions. (read-only)
+
+    Use [`subscribe`][..] and [`unsubscribe`][..] to manage them.
+    """
+
+    _subscription_handlers: dict[
+        str, Callable[[GeolocatorPositionChangeEvent], None]
+    ] = field(
+        default_factory=dict,
+        init=False,
+        repr=False,
+        compare=False,
+        metadata={"skip": True},
+    )
+    _subscription_positions: dict[str, GeolocatorPosition] = field(
+        default_factory=dict,
+        init=False,
+        repr=False,
+        compare=False,
+        metadata={"skip": True},
+    )
+
+    def before_event(self, e: ft.ControlEvent):
+        if isinstance(e, GeolocatorPositionChangeEvent) and self.delta_updates:
+            e.position = self._apply_position_delta(self.position, e.position)
+            # like properties updated by the client, the rebuilt position
+            # must not be marked as changed, or it would be sent back
+            object.__setattr__(self, "position", e.position)
+        return super().before_event(e)
+
+    async def _trigger_event(
+        self, event_name: str, event_data: Any, e: Optional[ft.ControlEvent] = None
+    ):
+        if e is None and event_name == "position_change":
+            e = from_dict(
+                GeolocatorPositionChangeEvent,
+                {"control": self, "name": event_name, **(event_data or {})},
+            )
+        if not isinstance(e, GeolocatorPositionChangeEvent) or e.subscription is None:
+            return await super()._trigger_event(event_name, event_data, e)
+
+        # positions of a named subscription go to its handler instead of
+        # `on_position_change`, dispatched the same way
+        if self.delta_updates:
+            e.position = self._apply_position_delta(
+                self._subscription_positions.get(e.subscription), e.position
+            )
+            self._subscription_positions[e.subscription] = e.position
+        handler = self._subscription_handlers.get(e.subscription)
+        if handler is None:
+            return
+
+        _context_page.set(self.page)
+        context.reset_auto_update()
+        session = self.page.session
+
+        if inspect.iscoroutinefunction(handler):
+            if get_param_count(handler) == 0:
+                await handler()
+            else:
+                await handler(e)
+
+        elif inspect.isasyncgenfunction(handler):
+            agen = handler() if get_param_count(handler) == 0 else handler(e)
+            async for _ in agen:
+                await session.after_event(session.index.get(self._i))
+                await asyncio.sleep(0)
+
+        elif inspect.isgeneratorfunction(handler):
+            gen = handler() if get_param_count(handler) == 0 else handler(e)
+            for _ in gen:
+                await session.after_event(session.index.get(self._i))
+                await asyncio.sleep(0)
+
+        elif callable(handler):
+            if get_param_count(handler) == 0:
+                handler()
+            else:
+                handler(e)
+
+        await session.after_event(session.index.get(self._i))
+
+    @staticmethod
+    def _apply_position_delta(
+        previous: Optional[GeolocatorPosition], delta: GeolocatorPosition
+    ) -> GeolocatorPosition:
+        if previous is None:
+            return delta
+        # a missing field is unchanged, except `floor`, which is nullable and
+        # thus always sent unless it stays `None`
+        return replace(
+            previous,
+            **{
+                f.name: getattr(delta, f.name)
+                for f in fields(GeolocatorPosition)
+                if f.name == "floor" or getattr(delta, f.name) is not None
+            },
+        )
+
+    def subscribe(
+        self,
+        name: str,
+        configuration: Optional[GeolocatorConfiguration],
+        handler: Callable[[GeolocatorPositionChangeEvent], None],
+        min_interval: ft.DurationValue = None,
+    ):
+        """
+        Adds a named position subscription, or replaces the one with the same name.
+
+        Each subscription receives positions at its own rate, so features with
+        different needs, such as a coarse presence heartbeat and a fine
+        navigation stream, can share a single `Geolocator`.
+        On the client, compatible subscriptions are served by a single native
+        position stream with the most demanding settings among them, and
+        positions are downsampled for each subscription according to its
+        distance filter, interval and `min_interval`.
+
+        While subscriptions exist, the stream of [`on_position_change`][..] is
+        only started if [`on_position_change`][..] or [`configuration`][..]
+        is set.
+
+        Args:
+            name: The unique name of the subscription.
+            configuration: The configuration of the subscription.
+            handler: Called with a [`GeolocatorPositionChangeEvent`][(p).] for
+                every position delivered to the subscription.
+                Like other event handlers, it can be a coroutine or generator
+                function, or take no arguments.
+            min_interval: The minimum time between two positions delivered
+                to the subscription.
+        """
+        self.subscriptions = [s for s in self.subscriptions if s.name != name] + [
+            GeolocatorSubscription(
+                name=name, configuration=configuration, min_interval=min_interval
+            )
+        ]
+        self._subscription_handlers[name] = handler
+        self.update()
+
+    def unsubscribe(self, name: str):
+        """
+        Removes a named position subscription.
+
+        Does nothing if there is no subscription with the given name.
+
+        Args:
+            name: The name of the subscription to remove.
+        """
+        if name not in self._subscription_handlers:
+            return
+        self.subscriptions = [s for s in self.subscriptions if s.name != name]
+        self._subscription_handlers.pop(name, None)
+        self._subscription_positions.pop(name, None)
+        self.update()
+
     async def get_current_position(
         self,
         configuration: Optional[GeolocatorConfiguration] = None,
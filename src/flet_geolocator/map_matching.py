@@ -0,0 +1,628 @@
+import array
+import heapq
+import json
+import math
+import os
+import xml.etree.ElementTree as ElementTree
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, NamedTuple, Optional, Union
+
+from flet_geolocator import analytics
+from flet_geolocator.analytics import TrackArrays
+from flet_geolocator.geodesy import EARTH_RADIUS, GridIndex, haversine_distance
+from flet_geolocator.types import (
+    GeolocatorMatchedPosition,
+    GeolocatorPosition,
+    GeolocatorPositionChangeEvent,
+)
+
+__all__ = ["MapMatcher", "RoadGraph"]
+
+_graph_cache: dict["_GraphFile", "RoadGraph"] = {}
+
+
+class RoadGraph:
+    """
+    A road network, made of straight road segments between nodes.
+
+    Roads are treated as traversable in both directions.
+    Segments are kept in a spatial grid index for fast candidate lookup.
+
+    Use [`from_geojson`][..] or [`from_osm`][..] to load a road network
+    from a local file.
+
+    Args:
+        cell_size: The size, in degrees, of a cell of the spatial index.
+    """
+
+    def __init__(self, cell_size: float = 0.01):
+        self.cell_size = cell_size
+        self.latitudes = array.array("d")
+        self.longitudes = array.array("d")
+        self.edge_sources = array.array("q")
+        self.edge_targets = array.array("q")
+        self.edge_lengths = array.array("d")
+        self.edge_ways = array.array("q")
+        self.ways: list[tuple[Optional[str], Optional[str]]] = []
+        self._adjacency: list[list[tuple[int, int]]] = []
+        self._node_ids: dict[Any, int] = {}
+        self._index: GridIndex[int] = GridIndex(cell_size)
+        # the file the graph was loaded from, while it is unchanged since
+        self._source: Optional[_GraphFile] = None
+
+    @property
+    def node_count(self) -> int:
+        """
+        The number of nodes of the graph.
+        """
+        return len(self.latitudes)
+
+    @property
+    def edge_count(self) -> int:
+        """
+        The number of road segments of the graph.
+        """
+        return len(self.edge_lengths)
+
+    def add_node(self, key: Any, latitude: float, longitude: float) -> int:
+        """
+        Adds a node, or returns the existing node with the same key.
+
+        Args:
+            key: A unique key of the node, such as an OSM node id.
+            latitude: The latitude of the node, in degrees.
+            longitude: The longitude of the node, in degrees.
+
+        Returns:
+            The index of the node.
+        """
+        node = self._node_ids.get(key)
+        if node is None:
+            node = len(self.latitudes)
+            self._node_ids[key] = node
+            self._source = None
+            self.latitudes.append(latitude)
+            self.longitudes.append(longitude)
+            self._adjacency.append([])
+        return node
+
+    def add_way(
+        self,
+        nodes: Sequence[int],
+        way_id: Optional[Any] = None,
+        name: Optional[str] = None,
+    ):
+        """
+        Adds a road going through the given nodes.
+
+        Args:
+            nodes: The indices of the nodes of the road, in order.
+            way_id: The identifier of the road.
+            name: The name of the road.
+        """
+        self._source = None
+        way = len(self.ways)
+        self.ways.append((str(way_id) if way_id is not None else None, name))
+        for u, v in zip(nodes, nodes[1:]):
+            if u == v:
+                continue
+            edge = len(self.edge_lengths)
+            length = haversine_distance(
+                self.latitudes[u],
+                self.longitudes[u],
+                self.latitudes[v],
+                self.longitudes[v],
+            )
+            self.edge_sources.append(u)
+            self.edge_targets.append(v)
+            self.edge_lengths.append(length)
+            self.edge_ways.append(way)
+            self._adjacency[u].append((v, edge))
+            self._adjacency[v].append((u, edge))
+            self._index.insert(
+                edge,
+                min(self.latitudes[u], self.latitudes[v]),
+                min(self.longitudes[u], self.longitudes[v]),
+                max(self.latitudes[u], self.latitudes[v]),
+                max(self.longitudes[u], self.longitudes[v]),
+            )
+
+    @classmethod
+    def from_geojson(
+        cls, source: Union[str, os.PathLike, dict], cell_size: float = 0.01
+    ) -> "RoadGraph":
+        """
+        Loads a road network from GeoJSON.
+
+        Every `LineString` and `MultiLineString` feature is a road; other
+        geometries are ignored. Roads sharing a vertex are connected.
+
+        Args:
+            source: The path to a GeoJSON file, or a parsed GeoJSON object.
+            cell_size: The size, in degrees, of a cell of the spatial index.
+
+        Returns:
+            The road network.
+        """
+        if isinstance(source, dict):
+            data = source
+        else:
+            stat = os.stat(source)
+            with open(source, encoding="utf-8") as f:
+                data = json.load(f)
+
+        graph = cls(cell_size)
+        features = data.get("features", []) if data.get("type") != "Feature" else [data]
+        for feature in features:
+            geometry = feature.get("geometry") or {}
+            if geometry.get("type") == "LineString":
+                lines = [geometry["coordinates"]]
+            elif geometry.get("type") == "MultiLineString":
+                lines = geometry["coordinates"]
+            else:
+                continue
+            properties = feature.get("properties") or {}
+            way_id = feature.get("id", properties.get("id"))
+            for line in lines:
+                nodes = [
+                    graph.add_node((round(c[1], 7), round(c[0], 7)), c[1], c[0])
+                    for c in line
+                ]
+                graph.add_way(nodes, way_id, properties.get("name"))
+
+        if not isinstance(source, dict):
+            graph._source = _GraphFile.of(graph, "geojson", source, stat, (cell_size,))
+        return graph
+
+    @classmethod
+    def from_osm(
+        cls,
+        path: Union[str, os.PathLike],
+        highways: Optional[Iterable[str]] = None,
+        cell_size: float = 0.01,
+    ) -> "RoadGraph":
+        """
+        Loads a road network from an OpenStreetMap XML extract (`.osm`).
+
+        Args:
+            path: The path to the `.osm` file.
+            highways: The `highway` tag values of the ways to load, such as
+                `"primary"` or `"residential"`. If `None`, all ways with a
+                `highway` tag are loaded.
+            cell_size: The size, in degrees, of a cell of the spatial index.
+
+        Returns:
+            The road network.
+        """
+        highways = set(highways) if highways is not None else None
+        stat = os.stat(path)
+        coordinates: dict[str, tuple[float, float]] = {}
+        graph = cls(cell_size)
+        for _, element in ElementTree.iterparse(path):
+            if element.tag == "node":
+                coordinates[element.get("id")] = (
+                    float(element.get("lat")),
+                    float(element.get("lon")),
+                )
+                element.clear()
+            elif element.tag == "way":
+                tags = {t.get("k"): t.get("v") for t in element.iter("tag")}
+                highway = tags.get("highway")
+                if highway is not None and (highways is None or highway in highways):
+                    nodes = [
+                        graph.add_node(ref, *coordinates[ref])
+                        for ref in (nd.get("ref") for nd in element.iter("nd"))
+                        if ref in coordinates
+                    ]
+                    graph.add_way(nodes, element.get("id"), tags.get("name"))
+                element.clear()
+
+        graph._source = _GraphFile.of(
+            graph,
+            "osm",
+            path,
+            stat,
+            (tuple(sorted(highways)) if highways is not None else None, cell_size),
+        )
+        return graph
+
+    def _nearest_edges(
+        self, latitude: float, longitude: float, radius: float
+    ) -> list["_Candidate"]:
+        # the projections on the segments within `radius`, closest first
+        candidates = []
+        for edge in self._index.query(latitude, longitude, radius):
+            candidate = self._project(edge, latitude, longitude)
+            if candidate.distance <= radius:
+                candidates.append(candidate)
+        candidates.sort(key=lambda c: c.distance)
+        return candidates
+
+    def _project(self, edge: int, latitude: float, longitude: float) -> "_Candidate":
+        # project onto a local plane centered on the coordinate, in meters
+        u, v = self.edge_sources[edge], self.edge_targets[edge]
+        k = math.radians(1) * EARTH_RADIUS
+        cos_lat = math.cos(math.radians(latitude))
+        ax = (self.longitudes[u] - longitude) * k * cos_lat
+        ay = (self.latitudes[u] - latitude) * k
+        bx = (self.longitudes[v] - longitude) * k * cos_lat
+        by = (self.latitudes[v] - latitude) * k
+        dx, dy = bx - ax, by - ay
+        length_sq = dx * dx + dy * dy
+        t = max(0.0, min(1.0, -(ax * dx + ay * dy) / length_sq)) if length_sq else 0.0
+        px, py = ax + t * dx, ay + t * dy
+        return _Candidate(
+            edge=edge,
+            offset=t,
+            latitude=latitude + py / k,
+            longitude=longitude + px / (k * cos_lat) if cos_lat else longitude,
+            distance=math.hypot(px, py),
+        )
+
+    def _route_distances(
+        self, source: "_Candidate", targets: Sequence["_Candidate"], limit: float
+    ) -> list[float]:
+        # Dijkstra from both ends of the source segment, bounded by `limit`
+        length = self.edge_lengths[source.edge]
+        distances = {
+            self.edge_sources[source.edge]: source.offset * length,
+            self.edge_targets[source.edge]: (1 - source.offset) * length,
+        }
+        pending = {
+            n
+            for t in targets
+            for n in (self.edge_sources[t.edge], self.edge_targets[t.edge])
+        }
+        heap = [(d, n) for n, d in distances.items()]
+        heapq.heapify(heap)
+        settled = set()
+        while heap and pending:
+            d, node = heapq.heappop(heap)
+            if node in settled:
+                continue
+            settled.add(node)
+            pending.discard(node)
+            for neighbor, edge in self._adjacency[node]:
+                nd = d + self.edge_lengths[edge]
+                if nd <= limit and nd < distances.get(neighbor, math.inf):
+                    distances[neighbor] = nd
+                    heapq.heappush(heap, (nd, neighbor))
+
+        result = []
+        for target in targets:
+            length = self.edge_lengths[target.edge]
+            if target.edge == source.edge:
+                result.append(abs(target.offset - source.offset) * length)
+                continue
+            d = min(
+                distances.get(self.edge_sources[target.edge], math.inf)
+                + target.offset * length,
+                distances.get(self.edge_targets[target.edge], math.inf)
+                + (1 - target.offset) * length,
+            )
+            result.append(d if d <= limit else math.inf)
+        return result
+
+
+class _GraphFile(NamedTuple):
+    # shipped to worker processes instead of a graph loaded from a file
+    kind: str
+    path: str
+    args: tuple
+    mtime_ns: int
+    size: int
+    node_count: int
+    edge_count: int
+
+    @classmethod
+    def of(
+        cls,
+        graph: RoadGraph,
+        kind: str,
+        path: Union[str, os.PathLike],
+        stat: os.stat_result,
+        args: tuple,
+    ) -> "_GraphFile":
+        return cls(
+            kind,
+            os.path.abspath(path),
+            args,
+            stat.st_mtime_ns,
+            stat.st_size,
+            graph.node_count,
+            graph.edge_count,
+        )
+
+    def load(self) -> Optional[RoadGraph]:
+        # loads the graph at most once per process, or returns `None` if the
+        # file changed since the graph was loaded from it
+        graph = _graph_cache.get(self)
+        if graph is not None:
+            return graph
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        if (stat.st_mtime_ns, stat.st_size) != (self.mtime_ns, self.size):
+            return None
+        if self.kind == "osm":
+            graph = RoadGraph.from_osm(self.path, *self.args)
+        else:
+            graph = RoadGraph.from_geojson(self.path, *self.args)
+        if (graph.node_count, graph.edge_count) != (self.node_count, self.edge_count):
+            return None
+        _graph_cache[self] = graph
+        return graph
+
+
+class _Candidate(NamedTuple):
+    edge: int
+    offset: float
+    latitude: float
+    longitude: float
+    distance: float
+
+
+class MapMatcher:
+    """
+    Snaps positions to the roads of a [`RoadGraph`][(p).].
+
+    Matching uses a hidden Markov model solved with the Viterbi algorithm
+    (Newson & Krumm, 2009): the road segments near each fix are candidate
+    states, scored by their distance to the fix, and transitions between
+    candidates are scored by how much the route distance along the roads
+    differs from the straight-line distance between the fixes.
+
+    Tracks can be matched as a whole with [`match_track`][..], or
+    incrementally, fix by fix, with [`add`][..]. The incremental mode only
+    keeps the candidates of the latest fix, so its memory is bounded.
+
+    Example:
+        ```python
+        matcher = ftg.MapMatcher(
+            ftg.RoadGraph.from_geojson("roads.geojson"),
+            on_match=lambda m: print(m.road_name, m.latitude, m.longitude),
+        )
+        geolocator.on_position_change = matcher.handle_position_change
+        ```
+
+    Args:
+        graph: The road network.
+        search_radius: The maximum distance, in meters, between a fix and
+            its candidate roads.
+        sigma: The standard deviation, in meters, of the GPS noise.
+            The [`accuracy`][flet_geolocator.GeolocatorPosition.accuracy] of
+            a fix is used instead when it is larger.
+        beta: The tolerated difference, in meters, between route and
+            straight-line distances of consecutive fixes.
+        max_candidates: The maximum number of candidate roads per fix.
+        max_detour: The maximum ratio between the route distance and the
+            straight-line distance of consecutive fixes.
+        on_match: Called with the [`GeolocatorMatchedPosition`][(p).] of
+            every fix processed by [`add`][..] that could be matched.
+    """
+
+    def __init__(
+        self,
+        graph: RoadGraph,
+        search_radius: float = 50,
+        sigma: float = 5,
+        beta: float = 5,
+        max_candidates: int = 8,
+        max_detour: float = 3,
+        on_match: Optional[Callable[[GeolocatorMatchedPosition], None]] = None,
+    ):
+        self.graph = graph
+        self.search_radius = search_radius
+        self.sigma = sigma
+        self.beta = beta
+        self.max_candidates = max_candidates
+        self.max_detour = max_detour
+        self.on_match = on_match
+        self.reset()
+
+    def reset(self):
+        """
+        Discards the state of the incremental mode.
+        """
+        self._last_fix: Optional[tuple[float, float]] = None
+        self._candidates: list[_Candidate] = []
+        self._scores: list[float] = []
+
+    def handle_position_change(self, e: GeolocatorPositionChangeEvent):
+        """
+        Processes the position of a
+        [`Geolocator.on_position_change`][(p).] event with [`add`][..].
+
+        Can be assigned as the event handler directly.
+        """
+        self.add(e.position)
+
+    def add(self, position: GeolocatorPosition) -> Optional[GeolocatorMatchedPosition]:
+        """
+        Matches the next fix of a stream, given the fixes added before.
+
+        Args:
+            position: The position to match.
+
+        Returns:
+            The most likely road position of the fix, or `None` if there is no
+            road within [`search_radius`][..].
+        """
+        state = (self._last_fix, self._candidates, self._scores)
+        state, _, best = self._step(
+            state, position.latitude, position.longitude, position.accuracy
+        )
+        self._last_fix, self._candidates, self._scores = state
+        if best is None:
+            return None
+        match = self._to_match(position, best)
+        if self.on_match is not None:
+            self.on_match(match)
+        return match
+
+    def match_track(
+        self, positions: Sequence[GeolocatorPosition]
+    ) -> list[Optional[GeolocatorMatchedPosition]]:
+        """
+        Matches a whole track.
+
+        Unlike [`add`][..], every fix is matched knowing the fixes that come
+        after it, which gives a consistent route.
+
+        Args:
+            positions: The positions of the track, in chronological order.
+
+        Returns:
+            The road position of every fix, or `None` for fixes without a road
+            within [`search_radius`][..].
+        """
+        matches = self._match(
+            [p.latitude for p in positions],
+            [p.longitude for p in positions],
+            [p.accuracy for p in positions],
+        )
+        return [
+            self._to_match(position, c) if c is not None else None
+            for position, c in zip(positions, matches)
+        ]
+
+    async def match_track_async(
+        self, positions: Sequence[GeolocatorPosition]
+    ) -> list[Optional[GeolocatorMatchedPosition]]:
+        """
+        Same as [`match_track`][..], but runs in the executor configured with
+        [`configure_executor`][flet_geolocator.analytics.configure_executor].
+
+        With a process pool, graphs loaded from a file and unchanged since
+        are sent to worker processes by path and loaded once per process;
+        other graphs are sent as a whole with each call.
+        """
+        track = TrackArrays.from_positions(positions)
+        accuracies = array.array(
+            "d", (p.accuracy if p.accuracy is not None else 0.0 for p in positions)
+        )
+        parameters = {
+            "search_radius": self.search_radius,
+            "sigma": self.sigma,
+            "beta": self.beta,
+            "max_candidates": self.max_candidates,
+            "max_detour": self.max_detour,
+        }
+        graph = self.graph
+        if isinstance(analytics.get_executor(), ProcessPoolExecutor):
+            graph = self.graph._source or self.graph
+        matches = await analytics.submit(
+            _match_track, [track], graph, parameters, accuracies
+        )
+        if matches is None:
+            # the file changed since the graph was loaded
+            matches = await analytics.submit(
+                _match_track, [track], self.graph, parameters, accuracies
+            )
+        return [
+            self._to_match(position, c) if c is not None else None
+            for position, c in zip(positions, matches)
+        ]
+
+    def _to_match(
+        self, position: GeolocatorPosition, candidate: _Candidate
+    ) -> GeolocatorMatchedPosition:
+        way_id, name = self.graph.ways[self.graph.edge_ways[candidate.edge]]
+        return GeolocatorMatchedPosition(
+            position=position,
+            latitude=candidate.latitude,
+            longitude=candidate.longitude,
+            distance=candidate.distance,
+            way_id=way_id,
+            road_name=name,
+        )
+
+    def _emission(self, candidate: _Candidate, accuracy: Optional[float]) -> float:
+        sigma = max(self.sigma, accuracy or 0)
+        return -0.5 * (candidate.distance / sigma) ** 2
+
+    def _step(
+        self,
+        state: tuple,
+        latitude: float,
+        longitude: float,
+        accuracy: Optional[float],
+    ) -> tuple[tuple, Optional[list[Optional[int]]], Optional[_Candidate]]:
+        # Advances the Viterbi algorithm by one fix. Returns the new state, the
+        # back-pointers of the new candidates and the best new candidate, or
+        # `None` if the fix could not be matched.
+        last_fix, previous, previous_scores = state
+        candidates = self.graph._nearest_edges(latitude, longitude, self.search_radius)
+        del candidates[self.max_candidates :]
+        if not candidates:
+            # skip the fix, keep matching from the previous one
+            return state, None, None
+
+        scores = [-math.inf] * len(candidates)
+        back: list[Optional[int]] = [None] * len(candidates)
+        if previous:
+            straight = haversine_distance(last_fix[0], last_fix[1], latitude, longitude)
+            limit = self.max_detour * straight + 2 * self.search_radius
+            for i, source in enumerate(previous):
+                routes = self.graph._route_distances(source, candidates, limit)
+                for j, route in enumerate(routes):
+                    if route == math.inf:
+                        continue
+                    score = previous_scores[i] - abs(route - straight) / self.beta
+                    if score > scores[j]:
+                        scores[j], back[j] = score, i
+
+        if max(scores) == -math.inf:
+            # first fix, or no route from the previous fix: start over
+            scores = [0.0] * len(candidates)
+            back = [None] * len(candidates)
+
+        for j, candidate in enumerate(candidates):
+            scores[j] += self._emission(candidate, accuracy)
+        best_score = max(scores)
+        scores = [s - best_score for s in scores]
+        best = scores.index(0.0)
+        return ((latitude, longitude), candidates, scores), back, candidates[best]
+
+    def _match(
+        self,
+        latitudes: Sequence[float],
+        longitudes: Sequence[float],
+        accuracies: Sequence[Optional[float]],
+    ) -> list[Optional[_Candidate]]:
+        layers = []
+        state = (None, [], [])
+        for i in range(len(latitudes)):
+            state, back, best = self._step(
+                state, latitudes[i], longitudes[i], accuracies[i]
+            )
+            if best is not None:
+                layers.append((i, state[1], state[2], back))
+
+        # backtrack from the best candidate of the last fix; where the chain
+        # was restarted, continue from the best candidate of the previous fix
+        result: list[Optional[_Candidate]] = [None] * len(latitudes)
+        j = None
+        for i, candidates, scores, back in reversed(layers):
+            if j is None:
+                j = scores.index(0.0)
+            result[i] = candidates[j]
+            j = back[j]
+        return result
+
+
+def _match_track(
+    track: TrackArrays,
+    graph: Union[RoadGraph, _GraphFile],
+    parameters: dict[str, Any],
+    accuracies: Sequence[float],
+) -> Optional[list[Optional[_Candidate]]]:
+    if isinstance(graph, _GraphFile):
+        graph = graph.load()
+        if graph is None:
+            return None
+    return MapMatcher(graph, **parameters)._match(
+        track.latitudes, track.longitudes, accuracies
+    )
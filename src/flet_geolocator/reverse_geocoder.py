@@ -0,0 +1,293 @@
+import io
+import os
+import zipfile
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from typing import Optional, Union
+
+from flet_geolocator.geodesy import (
+    GridIndex,
+    decode_geohash,
+    encode_geohash,
+    haversine_distance,
+)
+from flet_geolocator.types import GeolocatorPlace, GeolocatorPosition
+
+__all__ = ["ReverseGeocoder"]
+
+_MISSING = object()
+
+
+class ReverseGeocoder:
+    """
+    Resolves positions to the nearest known place, fully offline.
+
+    Places are kept in a spatial grid index, and lookups are cached in an LRU
+    cache keyed by the [geohash](https://en.wikipedia.org/wiki/Geohash) of the
+    looked-up coordinate. Each lookup is quantized to the center of its geohash
+    cell, so repeated lookups for nearly identical fixes resolve in constant
+    time and always return the same place. The place nearest to the center of
+    the cell is returned, which may differ from the place nearest to the
+    looked-up coordinate by up to the size of a cell.
+
+    Example:
+        ```python
+        geocoder = ftg.ReverseGeocoder.from_geonames(
+            "cities1000.zip",
+            admin1_codes_path="admin1CodesASCII.txt",
+        )
+
+        def handle_position_change(e: ftg.GeolocatorPositionChangeEvent):
+            place = geocoder.lookup(e.position)
+        ```
+
+    Args:
+        places: The places to resolve positions to.
+        geohash_precision: The length of the geohash used as cache key.
+            Higher values give more exact results, at the cost of a lower cache
+            hit rate. The default of `7` quantizes lookups to cells of
+            about 153m x 153m.
+        cache_size: The maximum number of cached lookups.
+            Set to `0` to disable caching.
+        max_distance: The maximum distance, in meters, between a position and
+            the place it resolves to. It is checked against the exact
+            coordinate of the position, not the center of its geohash cell.
+            If `None`, the nearest place is always returned, no matter how
+            far away it is.
+        cell_size: The size, in degrees, of a cell of the spatial index.
+
+    Raises:
+        ValueError: If `geohash_precision` is not positive or
+            `cache_size` is negative.
+    """
+
+    def __init__(
+        self,
+        places: Iterable[GeolocatorPlace],
+        geohash_precision: int = 7,
+        cache_size: int = 4096,
+        max_distance: Optional[float] = None,
+        cell_size: float = 0.5,
+    ):
+        if geohash_precision < 1:
+            raise ValueError("geohash_precision must be a positive integer")
+        if cache_size < 0:
+            raise ValueError("cache_size must not be negative")
+        self.geohash_precision = geohash_precision
+        self.cache_size = cache_size
+        self.max_distance = max_distance
+        self._places: list[GeolocatorPlace] = []
+        self._index: GridIndex[int] = GridIndex(cell_size)
+        self._cache: OrderedDict[str, Optional[GeolocatorPlace]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        for place in places:
+            self._index.insert(len(self._places), place.latitude, place.longitude)
+            self._places.append(place)
+
+    def __len__(self) -> int:
+        return len(self._places)
+
+    @classmethod
+    def from_geonames(
+        cls,
+        path: Union[str, os.PathLike],
+        admin1_codes_path: Optional[Union[str, os.PathLike]] = None,
+        country_info_path: Optional[Union[str, os.PathLike]] = None,
+        min_population: int = 0,
+        **kwargs,
+    ) -> "ReverseGeocoder":
+        """
+        Creates a reverse geocoder from a [GeoNames](https://www.geonames.org/)
+        dump.
+
+        The dumps can be downloaded from
+        https://download.geonames.org/export/dump/, for example `cities1000.zip`,
+        `admin1CodesASCII.txt` and `countryInfo.txt`.
+
+        Args:
+            path: The path to a GeoNames places file, such as `cities1000.txt`,
+                or to a `.zip` archive containing it.
+            admin1_codes_path: The path to `admin1CodesASCII.txt`, used to
+                resolve [`GeolocatorPlace.region`][(p).] names.
+            country_info_path: The path to `countryInfo.txt`, used to
+                resolve [`GeolocatorPlace.country`][(p).] names.
+            min_population: Places with a smaller population are skipped.
+            **kwargs: Additional arguments passed to the
+                [`ReverseGeocoder`][(p).] constructor.
+
+        Returns:
+            A new reverse geocoder.
+
+        Raises:
+            ValueError: If a `.zip` archive contains no `.txt` file.
+        """
+        regions = {}
+        if admin1_codes_path is not None:
+            for row in _read_tsv(admin1_codes_path):
+                if len(row) >= 2:
+                    regions[row[0]] = row[1]
+
+        countries = {}
+        if country_info_path is not None:
+            for row in _read_tsv(country_info_path):
+                if len(row) >= 5:
+                    countries[row[0]] = row[4]
+
+        def places() -> Iterator[GeolocatorPlace]:
+            for row in _read_tsv(path):
+                if len(row) < 15:
+                    continue
+                population = int(row[14] or 0)
+                if population < min_population:
+                    continue
+                country_code = row[8] or None
+                yield GeolocatorPlace(
+                    name=row[1],
+                    latitude=float(row[4]),
+                    longitude=float(row[5]),
+                    region=regions.get(f"{row[8]}.{row[10]}"),
+                    country_code=country_code,
+                    country=countries.get(country_code),
+                    population=population,
+                    timezone=row[17] if len(row) > 17 and row[17] else None,
+                )
+
+        return cls(places(), **kwargs)
+
+    def lookup(self, position: GeolocatorPosition) -> Optional[GeolocatorPlace]:
+        """
+        Resolves a position to the nearest known place.
+
+        Args:
+            position: The position to resolve.
+
+        Returns:
+            The nearest place, or `None` if there is no place within
+            [`max_distance`][..].
+        """
+        return self.lookup_coordinates(position.latitude, position.longitude)
+
+    def lookup_coordinates(
+        self, latitude: float, longitude: float
+    ) -> Optional[GeolocatorPlace]:
+        """
+        Resolves a coordinate to the nearest known place.
+
+        Args:
+            latitude: The latitude, in degrees.
+            longitude: The longitude, in degrees.
+
+        Returns:
+            The nearest place, or `None` if there is no place within
+            [`max_distance`][..].
+        """
+        key = encode_geohash(latitude, longitude, self.geohash_precision)
+        place = self._cache.get(key, _MISSING)
+        if place is not _MISSING:
+            self._hits += 1
+            self._cache.move_to_end(key)
+        else:
+            self._misses += 1
+            place = self._nearest_to_cell(key)
+            if self.cache_size:
+                self._cache[key] = place
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        if (
+            place is not None
+            and self.max_distance is not None
+            and haversine_distance(latitude, longitude, place.latitude, place.longitude)
+            > self.max_distance
+        ):
+            # the place nearest to the center of the cell is too far, but
+            # another one may still be within `max_distance` of the coordinate
+            return self._nearest(latitude, longitude, self.max_distance)
+        return place
+
+    def _nearest_to_cell(self, key: str) -> Optional[GeolocatorPlace]:
+        max_distance = self.max_distance
+        if max_distance is not None:
+            # a place within `max_distance` of any coordinate of the cell
+            # must be a candidate
+            max_distance += _geohash_cell_radius(key)
+        return self._nearest(*decode_geohash(key), max_distance)
+
+    def _nearest(
+        self, latitude: float, longitude: float, max_distance: Optional[float]
+    ) -> Optional[GeolocatorPlace]:
+        match = self._index.nearest(
+            latitude,
+            longitude,
+            lambda i: haversine_distance(
+                latitude,
+                longitude,
+                self._places[i].latitude,
+                self._places[i].longitude,
+            ),
+            max_distance,
+        )
+        return self._places[match[0]] if match is not None else None
+
+    def cache_info(self) -> dict[str, int]:
+        """
+        Returns statistics of the lookup cache.
+
+        Returns:
+            A dictionary with the `hits`, `misses`, `size` and `max_size`
+            of the cache.
+        """
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "size": len(self._cache),
+            "max_size": self.cache_size,
+        }
+
+    def clear_cache(self):
+        """
+        Clears the lookup cache and its statistics.
+        """
+        self._cache.clear()
+        self._hits = 0
+        self._misses = 0
+
+
+def _geohash_cell_radius(geohash: str) -> float:
+    # the distance, in meters, from the center of the cell to its farthest corner
+    latitude, longitude = decode_geohash(geohash)
+    latitude_bits = len(geohash) * 5 // 2
+    longitude_bits = len(geohash) * 5 - latitude_bits
+    half_height = 90 / 2**latitude_bits
+    half_width = 180 / 2**longitude_bits
+    return max(
+        haversine_distance(
+            latitude,
+            longitude,
+            max(-90.0, min(90.0, latitude + sign * half_height)),
+            longitude + half_width,
+        )
+        for sign in (-1, 1)
+    )
+
+
+def _read_tsv(path: Union[str, os.PathLike]) -> Iterator[list[str]]:
+    if os.fspath(path).lower().endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            stem = os.path.splitext(os.path.basename(path))[0]
+            names = [n for n in archive.namelist() if n.endswith(".txt")]
+            if not names:
+                raise ValueError(f"{os.fspath(path)!r} contains no .txt file")
+            name = f"{stem}.txt" if f"{stem}.txt" in names else names[0]
+            with archive.open(name) as raw:
+                yield from _parse_tsv(io.TextIOWrapper(raw, encoding="utf-8"))
+    else:
+        with open(path, encoding="utf-8") as f:
+            yield from _parse_tsv(f)
+
+
+def _parse_tsv(lines: Iterable[str]) -> Iterator[list[str]]:
+    for line in lines:
+        if line.startswith("#") or not line.strip():
+            continue
+        yield line.rstrip("\r\n").split("\t")
@@ -0,0 +1,305 @@
+import datetime
+from collections.abc import Callable, Iterable
+from typing import Optional
+
+from flet_geolocator.geodesy import haversine_distance
+from flet_geolocator.types import (
+    GeolocatorPosition,
+    GeolocatorPositionChangeEvent,
+    GeolocatorStayPoint,
+    GeolocatorTrip,
+)
+
+__all__ = ["TrackSegmenter"]
+
+
+class TrackSegmenter:
+    """
+    Incrementally splits a stream of positions into stay points and trips.
+
+    A stay point is detected when consecutive fixes remain within
+    [`radius`][..] of their running center for at least [`min_duration`][..],
+    and ends once [`min_exit_fixes`][..] consecutive fixes are outside of it,
+    so that isolated outliers caused by GPS jitter don't split a stay.
+    Movement between two stay points is reported as a trip.
+
+    Each fix is processed in constant time and memory, so the segmenter can be
+    fed directly from [`Geolocator.on_position_change`][(p).] or with a stored
+    track of any length.
+
+    Example:
+        ```python
+        segmenter = ftg.TrackSegmenter(
+            radius=100,
+            min_duration=datetime.timedelta(minutes=5),
+            on_trip_end=lambda trip: print(trip.distance, trip.average_speed),
+        )
+        geolocator.on_position_change = segmenter.handle_position_change
+        ```
+
+    Args:
+        radius: The maximum distance, in meters, between the fixes of a stay
+            and its center.
+        min_duration: The minimum time the device must remain within `radius`
+            for a stay point to be detected.
+        min_exit_fixes: The number of consecutive fixes outside of `radius`
+            needed to end a stay point. Outliers followed by a fix within
+            `radius` are ignored. Set to `1` to end a stay on the first fix
+            outside of it.
+        on_stay_start: Called with the [`GeolocatorStayPoint`][(p).] once a
+            stay is detected.
+        on_stay_end: Called with the [`GeolocatorStayPoint`][(p).] once the
+            device leaves it.
+        on_trip_end: Called with the [`GeolocatorTrip`][(p).] once the device
+            arrives at a stay point or the track is [finished][..finish].
+
+    Raises:
+        ValueError: If `radius` or `min_exit_fixes` is not positive.
+    """
+
+    def __init__(
+        self,
+        radius: float = 100,
+        min_duration: datetime.timedelta = datetime.timedelta(minutes=5),
+        min_exit_fixes: int = 3,
+        on_stay_start: Optional[Callable[[GeolocatorStayPoint], None]] = None,
+        on_stay_end: Optional[Callable[[GeolocatorStayPoint], None]] = None,
+        on_trip_end: Optional[Callable[[GeolocatorTrip], None]] = None,
+    ):
+        if radius <= 0:
+            raise ValueError("radius must be positive")
+        if min_exit_fixes < 1:
+            raise ValueError("min_exit_fixes must be positive")
+        self.radius = radius
+        self.min_duration = min_duration
+        self.min_exit_fixes = min_exit_fixes
+        self.on_stay_start = on_stay_start
+        self.on_stay_end = on_stay_end
+        self.on_trip_end = on_trip_end
+        self.reset()
+
+    def reset(self):
+        """
+        Discards all state, without reporting the ongoing stay or trip.
+        """
+        # last processed fix
+        self._last: Optional[tuple[float, float, datetime.datetime]] = None
+
+        # candidate (or confirmed) stay cluster
+        self._cluster_start: Optional[tuple[float, float, datetime.datetime]] = None
+        self._cluster_end: Optional[datetime.datetime] = None
+        self._cluster_latitude_sum = 0.0
+        self._cluster_longitude_sum = 0.0
+        self._cluster_count = 0
+        self._in_stay = False
+
+        # consecutive fixes outside of the confirmed stay
+        self._exits: list[tuple[float, float, datetime.datetime]] = []
+
+        # ongoing trip, and its state when the candidate cluster started
+        self._trip_start: Optional[tuple[float, float, datetime.datetime]] = None
+        self._trip_distance = 0.0
+        self._trip_count = 0
+        self._trip_distance_at_cluster = 0.0
+        self._trip_count_at_cluster = 0
+
+    @property
+    def current_stay(self) -> Optional[GeolocatorStayPoint]:
+        """
+        The ongoing stay point, or `None` if the device is not dwelling.
+        """
+        return self._stay() if self._in_stay else None
+
+    def handle_position_change(self, e: GeolocatorPositionChangeEvent):
+        """
+        Processes the position of a
+        [`Geolocator.on_position_change`][(p).] event.
+
+        Can be assigned as the event handler directly.
+        """
+        self.add(e.position)
+
+    def add(self, position: GeolocatorPosition):
+        """
+        Processes a position.
+
+        Args:
+            position: The position to process.
+
+        Raises:
+            ValueError: If the position has no timestamp.
+        """
+        if position.timestamp is None:
+            raise ValueError("position must have a timestamp")
+        self.add_coordinates(position.latitude, position.longitude, position.timestamp)
+
+    def add_coordinates(
+        self, latitude: float, longitude: float, timestamp: datetime.datetime
+    ):
+        """
+        Processes a fix given by its coordinates.
+
+        Fixes older than the previously processed one are ignored.
+
+        Args:
+            latitude: The latitude of the fix, in degrees.
+            longitude: The longitude of the fix, in degrees.
+            timestamp: The time of the fix.
+        """
+        previous = self._exits[-1] if self._exits else self._last
+        if previous is not None and timestamp < previous[2]:
+            return
+        if self._in_stay and self._exits_stay(latitude, longitude, timestamp):
+            return
+
+        if self._last is not None:
+            step = haversine_distance(self._last[0], self._last[1], latitude, longitude)
+        else:
+            step = 0.0
+        fix = (latitude, longitude, timestamp)
+
+        if self._cluster_start is not None:
+            center_latitude, center_longitude = self._cluster_center()
+            offset = haversine_distance(
+                center_latitude, center_longitude, latitude, longitude
+            )
+            if offset <= self.radius:
+                if not self._in_stay:
+                    self._trip_distance += step
+                    self._trip_count += 1
+                self._cluster_latitude_sum += latitude
+                self._cluster_longitude_sum += _unwrap_longitude(
+                    longitude, self._cluster_start[1]
+                )
+                self._cluster_count += 1
+                self._cluster_end = timestamp
+                self._last = fix
+                if (
+                    not self._in_stay
+                    and timestamp - self._cluster_start[2] >= self.min_duration
+                ):
+                    self._start_stay()
+                return
+
+        # the fix starts a new candidate cluster
+        if self._trip_start is None:
+            self._trip_start = fix
+        self._trip_distance += step
+        self._trip_count += 1
+        self._trip_distance_at_cluster = self._trip_distance
+        self._trip_count_at_cluster = self._trip_count
+        self._cluster_start = fix
+        self._cluster_end = timestamp
+        self._cluster_latitude_sum = latitude
+        self._cluster_longitude_sum = longitude
+        self._cluster_count = 1
+        self._last = fix
+
+    def _exits_stay(
+        self, latitude: float, longitude: float, timestamp: datetime.datetime
+    ) -> bool:
+        # returns whether the fix has been handled, i.e. it is outside of the
+        # confirmed stay
+        center_latitude, center_longitude = self._cluster_center()
+        if (
+            haversine_distance(center_latitude, center_longitude, latitude, longitude)
+            <= self.radius
+        ):
+            self._exits.clear()
+            return False
+        self._exits.append((latitude, longitude, timestamp))
+        if len(self._exits) < self.min_exit_fixes:
+            return True
+
+        # the stay is over: the trip starts at its last fix, and the fixes
+        # outside of it are processed again as the start of the trip
+        exits = self._exits
+        self._exits = []
+        self._end_stay()
+        self._trip_start = self._last
+        self._trip_distance = 0.0
+        self._trip_count = 1
+        self._cluster_start = None
+        for fix in exits:
+            self.add_coordinates(*fix)
+        return True
+
+    def add_track(self, positions: Iterable[GeolocatorPosition]):
+        """
+        Processes a stored track and [finishes][..finish] it.
+
+        Args:
+            positions: The positions of the track, in chronological order.
+        """
+        for position in positions:
+            self.add(position)
+        self.finish()
+
+    def finish(self):
+        """
+        Reports the ongoing stay or trip as ended and resets the segmenter.
+        """
+        if self._in_stay:
+            self._end_stay()
+        elif self._trip_start is not None and self._last is not None:
+            self._end_trip(self._last, self._trip_distance, self._trip_count)
+        self.reset()
+
+    def _cluster_center(self) -> tuple[float, float]:
+        return (
+            self._cluster_latitude_sum / self._cluster_count,
+            _unwrap_longitude(self._cluster_longitude_sum / self._cluster_count, 0),
+        )
+
+    def _stay(self) -> GeolocatorStayPoint:
+        latitude, longitude = self._cluster_center()
+        return GeolocatorStayPoint(
+            latitude=latitude,
+            longitude=longitude,
+            start=self._cluster_start[2],
+            end=self._cluster_end,
+            fix_count=self._cluster_count,
+        )
+
+    def _start_stay(self):
+        self._in_stay = True
+        if self._trip_start is not None and self._trip_start is not self._cluster_start:
+            self._end_trip(
+                self._cluster_start,
+                self._trip_distance_at_cluster,
+                self._trip_count_at_cluster,
+            )
+        self._trip_start = None
+        if self.on_stay_start is not None:
+            self.on_stay_start(self._stay())
+
+    def _end_stay(self):
+        self._in_stay = False
+        if self.on_stay_end is not None:
+            self.on_stay_end(self._stay())
+
+    def _end_trip(
+        self,
+        end: tuple[float, float, datetime.datetime],
+        distance: float,
+        fix_count: int,
+    ):
+        if self.on_trip_end is not None and end[2] > self._trip_start[2]:
+            self.on_trip_end(
+                GeolocatorTrip(
+                    start=self._trip_start[2],
+                    end=end[2],
+                    start_latitude=self._trip_start[0],
+                    start_longitude=self._trip_start[1],
+                    end_latitude=end[0],
+                    end_longitude=end[1],
+                    distance=distance,
+                    fix_count=fix_count,
+                )
+            )
+
+
+def _unwrap_longitude(longitude: float, reference: float) -> float:
+    # the longitude equivalent to `longitude` within 180 degrees of `reference`,
+    # so that the fixes of a cluster across the antimeridian can be averaged
+    return reference + (longitude - reference + 180) % 360 - 180
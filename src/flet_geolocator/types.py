@@ -14,10 +14,17 @@ __all__ = [
     "GeolocatorConfiguration",
     "GeolocatorIosActivityType",
     "GeolocatorIosConfiguration",
+    "GeolocatorMatchedPosition",
+    "GeolocatorPermissionChangeEvent",
     "GeolocatorPermissionStatus",
+    "GeolocatorPlace",
     "GeolocatorPosition",
     "GeolocatorPositionAccuracy",
     "GeolocatorPositionChangeEvent",
+    "GeolocatorServiceStatusChangeEvent",
+    "GeolocatorStayPoint",
+    "GeolocatorSubscription",
+    "GeolocatorTrip",
     "GeolocatorWebConfiguration",
 ]
 
@@ -412,9 +419,246 @@ class GeolocatorAndroidConfiguration(GeolocatorConfiguration):
     foreground_notification_config: Optional[ForegroundNotificationConfiguration] = None
 
 
+@dataclass(frozen=True)
+class GeolocatorPlace:
+    """A named place, as resolved by a [`ReverseGeocoder`][(p).]."""
+
+    name: str
+    """
+    The name of the place, usually a city or town.
+    """
+
+    latitude: ft.Number
+    """
+    The latitude of the place, in degrees.
+    """
+
+    longitude: ft.Number
+    """
+    The longitude of the place, in degrees.
+    """
+
+    region: Optional[str] = None
+    """
+    The name of the first-level administrative division (state, province, etc.)
+    the place belongs to, if known.
+    """
+
+    country_code: Optional[str] = None
+    """
+    The ISO-3166 alpha-2 code of the country the place belongs to, if known.
+    """
+
+    country: Optional[str] = None
+    """
+    The name of the country the place belongs to, if known.
+    """
+
+    population: int = 0
+    """
+    The population of the place, or `0` if unknown.
+    """
+
+    timezone: Optional[str] = None
+    """
+    The IANA timezone identifier of the place, if known.
+    """
+
+
+@dataclass
+class GeolocatorMatchedPosition:
+    """A position snapped to a road by a [`MapMatcher`][(p).]."""
+
+    position: GeolocatorPosition
+    """
+    The original position.
+    """
+
+    latitude: ft.Number
+    """
+    The latitude of the position on the road, in degrees.
+    """
+
+    longitude: ft.Number
+    """
+    The longitude of the position on the road, in degrees.
+    """
+
+    distance: float
+    """
+    The distance, in meters, between the original position and the road.
+    """
+
+    way_id: Optional[str] = None
+    """
+    The identifier of the matched road: the OSM way id, or the `id` of the
+    GeoJSON feature, if any.
+    """
+
+    road_name: Optional[str] = None
+    """
+    The name of the matched road, if known.
+    """
+
+
+@dataclass
+class GeolocatorStayPoint:
+    """
+    A place where the device dwelled, as detected by a [`TrackSegmenter`][(p).].
+    """
+
+    latitude: ft.Number
+    """
+    The latitude of the center of the stay point, in degrees.
+    """
+
+    longitude: ft.Number
+    """
+    The longitude of the center of the stay point, in degrees.
+    """
+
+    start: datetime.datetime
+    """
+    The time of the first fix of the stay.
+    """
+
+    end: datetime.datetime
+    """
+    The time of the last fix of the stay.
+
+    While the stay is ongoing, this is the time of the latest fix so far.
+    """
+
+    fix_count: int
+    """
+    The number of fixes that make up the stay.
+    """
+
+    @property
+    def duration(self) -> datetime.timedelta:
+        """
+        The time spent at the stay point.
+        """
+        return self.end - self.start
+
+
+@dataclass
+class GeolocatorTrip:
+    """
+    A movement between two stay points, as detected by a [`TrackSegmenter`][(p).].
+    """
+
+    start: datetime.datetime
+    """
+    The time at which the trip started.
+    """
+
+    end: datetime.datetime
+    """
+    The time at which the trip ended.
+    """
+
+    start_latitude: ft.Number
+    """
+    The latitude at which the trip started, in degrees.
+    """
+
+    start_longitude: ft.Number
+    """
+    The longitude at which the trip started, in degrees.
+    """
+
+    end_latitude: ft.Number
+    """
+    The latitude at which the trip ended, in degrees.
+    """
+
+    end_longitude: ft.Number
+    """
+    The longitude at which the trip ended, in degrees.
+    """
+
+    distance: float
+    """
+    The distance traveled along the fixes of the trip, in meters.
+    """
+
+    fix_count: int
+    """
+    The number of fixes that make up the trip.
+    """
+
+    @property
+    def duration(self) -> datetime.timedelta:
+        """
+        The duration of the trip.
+        """
+        return self.end - self.start
+
+    @property
+    def average_speed(self) -> float:
+        """
+        The average speed over the trip, in meters per second.
+        """
+        seconds = self.duration.total_seconds()
+        return self.distance / seconds if seconds > 0 else 0.0
+
+
+@dataclass
+class GeolocatorSubscription:
+    """
+    A named position subscription of a [`Geolocator`][(p).].
+
+    Created with [`Geolocator.subscribe`][(p).].
+    """
+
+    name: str
+    """
+    The unique name of the subscription.
+    """
+
+    configuration: Optional[GeolocatorConfiguration] = None
+    """
+    The configuration of the subscription.
+
+    Compatible subscriptions share a single native position stream configured
+    with the most demanding accuracy, distance filter and interval among them.
+    """
+
+    min_interval: ft.DurationValue = None
+    """
+    The minimum time between two positions delivered to the subscription.
+
+    For no minimum, set to `None`.
+    """
+
+
 @dataclass
 class GeolocatorPositionChangeEvent(ft.Event["Geolocator"]):
     position: GeolocatorPosition
     """
     The current/new position of the device.
     """
+
+    subscription: Optional[str] = None
+    """
+    The name of the [subscription][flet_geolocator.Geolocator.subscribe]
+    the position was delivered to, or `None` for
+    [`Geolocator.on_position_change`][(p).].
+    """
+
+
+@dataclass
+class GeolocatorServiceStatusChangeEvent(ft.Event["Geolocator"]):
+    enabled: bool
+    """
+    Whether the location service of the device is enabled.
+    """
+
+
+@dataclass
+class GeolocatorPermissionChangeEvent(ft.Event["Geolocator"]):
+    status: GeolocatorPermissionStatus
+    """
+    The permission the app has been granted to access the device's location.
+    """
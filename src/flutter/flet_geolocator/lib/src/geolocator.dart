@@ -2,14 +2,22 @@ import 'dart:async';
 
 import 'package:flet/flet.dart';
 import 'package:flutter/foundation.dart';
+import 'package:flutter/widgets.dart';
 import 'package:geolocator/geolocator.dart';
 
 import 'utils/geolocator.dart';
+import 'utils/subscriptions.dart';
 
 class GeolocatorService extends FletService {
   GeolocatorService({required super.control});
 
-  StreamSubscription<Position>? _onPositionChangedSubscription;
+  final List<StreamSubscription<Position>> _positionStreamSubscriptions = [];
+  final List<PositionConsumer> _positionConsumers = [];
+  String? _positionStreamsSignature;
+  StreamSubscription<ServiceStatus>? _serviceStatusSubscription;
+  AppLifecycleListener? _lifecycleListener;
+  LocationPermission? _permission;
+  bool? _serviceEnabled;
 
   @override
   void init() {
@@ -17,6 +25,45 @@ class GeolocatorService extends FletService {
     debugPrint("Geolocator(${control.id}).init: ${control.properties}");
     control.addInvokeMethodListener(_invokeMethod);
     registerEvents();
+    if (!kIsWeb) {
+      _serviceStatusSubscription = Geolocator.getServiceStatusStream().listen(
+          (status) => _updateServiceEnabled(status == ServiceStatus.enabled));
+    }
+    // the user may have changed settings while the app was in the background
+    _lifecycleListener = AppLifecycleListener(onResume: _onResume);
+    _checkStatus();
+  }
+
+  void _onResume() {
+    // events sent while the app was in the background, possibly
+    // disconnected, may have been lost: start over with full positions
+    for (var consumer in _positionConsumers) {
+      consumer.lastSent = null;
+    }
+    _checkStatus();
+  }
+
+  Future<void> _checkStatus() async {
+    try {
+      _updatePermission(await Geolocator.checkPermission());
+      _updateServiceEnabled(await Geolocator.isLocationServiceEnabled());
+    } catch (error) {
+      control.triggerEvent("error", error.toString());
+    }
+  }
+
+  void _updatePermission(LocationPermission permission) {
+    if (permission == _permission) return;
+    _permission = permission;
+    control.updateProperties({"permission_status": permission.name});
+    control.triggerEvent("permission_change", {"status": permission.name});
+  }
+
+  void _updateServiceEnabled(bool enabled) {
+    if (enabled == _serviceEnabled) return;
+    _serviceEnabled = enabled;
+    control.updateProperties({"service_enabled": enabled});
+    control.triggerEvent("service_status_change", {"enabled": enabled});
   }
 
   @override
@@ -26,26 +73,71 @@ class GeolocatorService extends FletService {
   }
 
   void registerEvents() {
-    _onPositionChangedSubscription = Geolocator.getPositionStream(
-      locationSettings: parseLocationSettings(
-        control.get("configuration"),
-        // Theme.of(context),
-      ),
-    ).listen(
-      (Position? position) {
-        if (position != null) {
-          control.updateProperties({"position": position.toMap()});
-          control
-              .triggerEvent("position_change", {"position": position.toMap()});
-        }
-      },
-      onError: (Object error, StackTrace stackTrace) {
-        control.triggerEvent("error", error.toString());
-      },
-      onDone: () {
-        // done
-      },
-    );
+    var configuration = control.get("configuration");
+    var subscriptions = control.get<List>("subscriptions") ?? [];
+    var deltaUpdates = control.getBool("delta_updates", false)!;
+
+    // keep the running streams if nothing they depend on has changed
+    var signature = "$configuration $subscriptions $deltaUpdates "
+        "${control.getBool("on_position_change", false)}";
+    if (signature == _positionStreamsSignature) return;
+    _positionStreamsSignature = signature;
+    _cancelPositionStreams();
+
+    var consumers = <PositionConsumer>[
+      if (subscriptions.isEmpty ||
+          configuration != null ||
+          control.getBool("on_position_change", false)!)
+        PositionConsumer(null, configuration),
+      for (var s in subscriptions)
+        PositionConsumer(
+            s["name"], s["configuration"], parseDuration(s["min_interval"])),
+    ];
+
+    _positionConsumers.addAll(consumers);
+    for (var group in groupPositionConsumers(consumers)) {
+      _positionStreamSubscriptions.add(Geolocator.getPositionStream(
+        locationSettings: parseLocationSettings(group.configuration),
+      ).listen(
+        (Position? position) {
+          if (position == null) return;
+          for (var consumer in group.consumers) {
+            if (consumer.accepts(position, group)) {
+              _sendPosition(consumer, position, deltaUpdates);
+            }
+          }
+        },
+        onError: (Object error, StackTrace stackTrace) {
+          control.triggerEvent("error", error.toString());
+        },
+      ));
+    }
+  }
+
+  void _sendPosition(
+      PositionConsumer consumer, Position position, bool deltaUpdates) {
+    Map<String, dynamic> data;
+    if (deltaUpdates) {
+      // Python rebuilds the full position and updates its property locally
+      data = {"position": consumer.deltaMap(position)};
+    } else {
+      data = {"position": position.toMap()};
+      if (consumer.name == null) {
+        control.updateProperties({"position": data["position"]});
+      }
+    }
+    if (consumer.name != null) {
+      data["subscription"] = consumer.name;
+    }
+    control.triggerEvent("position_change", data);
+  }
+
+  void _cancelPositionStreams() {
+    for (var subscription in _positionStreamSubscriptions) {
+      subscription.cancel();
+    }
+    _positionStreamSubscriptions.clear();
+    _positionConsumers.clear();
   }
 
   Future<dynamic> _invokeMethod(String name, dynamic args) async {
@@ -53,12 +145,15 @@ class GeolocatorService extends FletService {
     switch (name) {
       case "request_permission":
         var permission = await Geolocator.requestPermission();
+        _updatePermission(permission);
         return permission.name;
       case "get_permission_status":
         var permission = await Geolocator.checkPermission();
+        _updatePermission(permission);
         return permission.name;
       case "is_location_service_enabled":
         var serviceEnabled = await Geolocator.isLocationServiceEnabled();
+        _updateServiceEnabled(serviceEnabled);
         return serviceEnabled;
       case "open_app_settings":
         if (!kIsWeb) {
@@ -106,7 +201,9 @@ class GeolocatorService extends FletService {
   void dispose() {
     debugPrint("Geolocator(${control.id}).dispose()");
     control.removeInvokeMethodListener(_invokeMethod);
-    _onPositionChangedSubscription?.cancel();
+    _cancelPositionStreams();
+    _serviceStatusSubscription?.cancel();
+    _lifecycleListener?.dispose();
     super.dispose();
   }
 }
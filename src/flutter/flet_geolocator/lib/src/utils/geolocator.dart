@@ -26,6 +26,20 @@ extension PositionExtension on Position {
         "floor": floor,
         "mocked": isMocked,
       };
+
+  /// Returns only the fields that changed since [previous], which is the
+  /// [toMap] of the previously sent position, or all fields if it is `null`.
+  ///
+  /// `floor` is nullable, so it is kept unless it stays `null`, letting the
+  /// receiver treat every other missing field as unchanged.
+  Map<String, dynamic> toDeltaMap(Map<String, dynamic>? previous) {
+    var map = toMap();
+    if (previous != null) {
+      map.removeWhere((key, value) =>
+          value == previous[key] && (key != "floor" || value == null));
+    }
+    return map;
+  }
 }
 
 ActivityType? parseActivityType(String? value, [ActivityType? defaultValue]) {
@@ -0,0 +1,159 @@
+import 'package:flet/flet.dart';
+import 'package:geolocator/geolocator.dart';
+
+import 'geolocator.dart';
+
+/// Accuracy values, from the least to the most demanding.
+const _accuracyRanks = [
+  "reduced",
+  "lowest",
+  "low",
+  "medium",
+  "high",
+  "best",
+  "bestForNavigation",
+];
+
+int _accuracyRank(dynamic value) {
+  var rank = _accuracyRanks.indexWhere(
+      (e) => e.toLowerCase() == value?.toString().toLowerCase());
+  return rank != -1 ? rank : _accuracyRanks.indexOf("best");
+}
+
+Duration _intervalDuration(Map<String, dynamic>? configuration) =>
+    parseDuration(
+        configuration?["interval_duration"],
+        isAndroidMobile()
+            ? const Duration(milliseconds: 5000)
+            : Duration.zero)!;
+
+/// With delta updates, every [_fullPositionEvery]-th position is sent in full,
+/// and at least one every [_fullPositionInterval], so that Python catches up
+/// if a delta was lost.
+const _fullPositionEvery = 10;
+const _fullPositionInterval = Duration(seconds: 30);
+
+/// A consumer of device positions: either the `on_position_change` stream
+/// (with a `null` [name]) or a named subscription.
+class PositionConsumer {
+  PositionConsumer(this.name, dynamic configuration, [Duration? minInterval])
+      : configuration = configuration != null
+            ? Map<String, dynamic>.from(configuration)
+            : null {
+    distanceFilter = parseInt(this.configuration?["distance_filter"], 0)!;
+    var intervalDuration = _intervalDuration(this.configuration);
+    interval = minInterval != null && minInterval > intervalDuration
+        ? minInterval
+        : intervalDuration;
+  }
+
+  final String? name;
+  final Map<String, dynamic>? configuration;
+  late final int distanceFilter;
+  late final Duration interval;
+
+  /// The last position delivered to this consumer.
+  Position? lastPosition;
+
+  /// The map of the last position sent to Python, used as the delta base.
+  Map<String, dynamic>? lastSent;
+
+  int _positionsSinceFullPosition = 0;
+  DateTime? _lastFullPositionAt;
+
+  /// Returns the map of [position] to send to Python with delta updates:
+  /// only the fields changed since [lastSent], or the full position when
+  /// there is no delta base or a periodic full position is due.
+  Map<String, dynamic> deltaMap(Position position) {
+    var now = DateTime.now();
+    var full = lastSent == null ||
+        _positionsSinceFullPosition >= _fullPositionEvery ||
+        now.difference(_lastFullPositionAt!) >= _fullPositionInterval;
+    var map = full ? position.toMap() : position.toDeltaMap(lastSent);
+    if (full) {
+      _positionsSinceFullPosition = 1;
+      _lastFullPositionAt = now;
+    } else {
+      _positionsSinceFullPosition++;
+    }
+    lastSent = position.toMap();
+    return map;
+  }
+
+  /// Whether [position], received from the stream of [group], should be
+  /// delivered to this consumer, according to its own distance filter and
+  /// interval.
+  bool accepts(Position position, PositionStreamGroup group) {
+    var last = lastPosition;
+    if (last != null) {
+      if (interval > group.interval &&
+          position.timestamp.difference(last.timestamp) < interval) {
+        return false;
+      }
+      if (distanceFilter > group.distanceFilter &&
+          Geolocator.distanceBetween(last.latitude, last.longitude,
+                  position.latitude, position.longitude) <
+              distanceFilter) {
+        return false;
+      }
+    }
+    lastPosition = position;
+    return true;
+  }
+}
+
+/// Consumers served by a single native position stream.
+class PositionStreamGroup {
+  PositionStreamGroup(this.consumers) {
+    if (consumers.every((c) => c.configuration == null)) {
+      configuration = null;
+      distanceFilter = 0;
+      interval = _intervalDuration(null);
+      return;
+    }
+
+    // the most demanding settings among the consumers
+    var merged = Map<String, dynamic>.from(
+        consumers.firstWhere((c) => c.configuration != null).configuration!);
+    merged["accuracy"] = consumers
+        .map((c) => c.configuration?["accuracy"])
+        .reduce((a, b) => _accuracyRank(b) > _accuracyRank(a) ? b : a);
+    distanceFilter =
+        consumers.map((c) => c.distanceFilter).reduce((a, b) => a < b ? a : b);
+    merged["distance_filter"] = distanceFilter;
+    var fastest = consumers.reduce((a, b) =>
+        _intervalDuration(b.configuration) < _intervalDuration(a.configuration)
+            ? b
+            : a);
+    interval = _intervalDuration(fastest.configuration);
+    merged["interval_duration"] = fastest.configuration?["interval_duration"];
+    configuration = merged;
+  }
+
+  final List<PositionConsumer> consumers;
+
+  /// The settings of the native stream, in the format of
+  /// `GeolocatorConfiguration`.
+  late final Map<String, dynamic>? configuration;
+  late final int distanceFilter;
+  late final Duration interval;
+}
+
+/// Groups [consumers] whose configurations only differ by accuracy,
+/// distance filter and interval, so each group can be served by one native
+/// stream.
+List<PositionStreamGroup> groupPositionConsumers(
+    List<PositionConsumer> consumers) {
+  var groups = <String, List<PositionConsumer>>{};
+  for (var consumer in consumers) {
+    var key = consumer.configuration != null
+        ? (Map<String, dynamic>.from(consumer.configuration!)
+              ..remove("accuracy")
+              ..remove("distance_filter")
+              ..remove("interval_duration"))
+            .toString()
+        : "{}";
+    groups.putIfAbsent(key, () => []).add(consumer);
+  }
+  return groups.values.map((g) => PositionStreamGroup(g)).toList();
+}
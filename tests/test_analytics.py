@@ -0,0 +1,146 @@
+import array
+import asyncio
+import datetime
+import math
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import pytest
+
+from flet_geolocator import analytics
+from flet_geolocator.analytics import TrackArrays
+from flet_geolocator.geodesy import haversine_distance
+
+T0 = datetime.datetime(2025, 1, 1, 8, tzinfo=datetime.timezone.utc).timestamp()
+
+
+def make_track() -> TrackArrays:
+    latitudes = [52.0] * 11 + [52.0 + i * 0.001 for i in range(1, 11)] + [52.01] * 6
+    return TrackArrays(
+        array.array("d", latitudes),
+        array.array("d", [13.0] * len(latitudes)),
+        array.array("d", [T0 + 60 * i for i in range(len(latitudes))]),
+    )
+
+
+def columns(track: TrackArrays) -> tuple[list[float], list[float], list[float]]:
+    return list(track.latitudes), list(track.longitudes), list(track.timestamps)
+
+
+@pytest.fixture
+def process_pool():
+    analytics.configure_executor(max_workers=1)
+    yield
+    analytics.shutdown_executor()
+    analytics.configure_executor()
+
+
+@pytest.fixture
+def thread_pool():
+    with ThreadPoolExecutor(1) as executor:
+        analytics.configure_executor(executor)
+        yield
+    analytics.configure_executor()
+
+
+@pytest.mark.parametrize("track", [make_track(), TrackArrays()])
+def test_share_round_trip(track):
+    shm, shared = analytics._share(track)
+    try:
+        assert shared.length == len(track)
+        result = analytics._run_shared(columns, [shared], ())
+    finally:
+        shm.close()
+        shm.unlink()
+    assert result == columns(track)
+
+
+def test_run_shared_passes_args_and_releases_blocks():
+    a, b = make_track(), TrackArrays()
+    shm_a, shared_a = analytics._share(a)
+    shm_b, shared_b = analytics._share(b)
+    try:
+        result = analytics._run_shared(
+            lambda x, y, scale: (len(x), len(y), scale * x.latitudes[0]),
+            [shared_a, shared_b],
+            (2,),
+        )
+        assert result == (len(a), 0, 104.0)
+    finally:
+        for shm in (shm_a, shm_b):
+            shm.close()
+            shm.unlink()
+
+
+def test_default_mp_context_does_not_fork():
+    assert analytics._default_mp_context().get_start_method() != "fork"
+
+
+def test_track_length():
+    track = make_track()
+    assert analytics.track_length(track) == pytest.approx(
+        haversine_distance(52.0, 13.0, 52.01, 13.0)
+    )
+    assert analytics.track_length(TrackArrays()) == 0
+
+
+def test_simplify_track():
+    # an L-shaped track of about 222m per side
+    track = TrackArrays(
+        array.array("d", [52.0, 52.001, 52.002, 52.002, 52.002]),
+        array.array("d", [13.0, 13.0, 13.0, 13.003, 13.006]),
+        array.array("d", [T0 + i for i in range(5)]),
+    )
+    assert columns(analytics.simplify_track(track, 1)) == columns(
+        track.select([0, 2, 4])
+    )
+    assert columns(analytics.simplify_track(make_track(), 1)) == columns(
+        make_track().select([0, 26])
+    )
+
+
+def test_segment_track_requires_timestamps():
+    track = make_track()
+    track.timestamps[3] = math.nan
+    with pytest.raises(ValueError):
+        analytics.segment_track(track)
+
+
+@pytest.mark.parametrize("pool", ["process_pool", "thread_pool"])
+def test_async_matches_sync(pool, request):
+    request.getfixturevalue(pool)
+    track = make_track()
+    other = track.select([0, 15, 26])
+
+    async def run():
+        return (
+            await analytics.track_length_async(track),
+            await analytics.track_length_async(TrackArrays()),
+            await analytics.distance_matrix_async(track, other),
+            columns(await analytics.simplify_track_async(track, 1)),
+            await analytics.segment_track_async(track, 50),
+        )
+
+    assert asyncio.run(run()) == (
+        analytics.track_length(track),
+        0,
+        analytics.distance_matrix(track, other),
+        columns(analytics.simplify_track(track, 1)),
+        analytics.segment_track(track, 50),
+    )
+
+
+def test_async_unlinks_shared_memory(process_pool, monkeypatch):
+    names = []
+    share = analytics._share
+
+    def recording_share(track):
+        shm, shared = share(track)
+        names.append(shared.name)
+        return shm, shared
+
+    monkeypatch.setattr(analytics, "_share", recording_share)
+    asyncio.run(analytics.track_length_async(make_track()))
+    assert len(names) == 1
+    with pytest.raises(FileNotFoundError):
+        SharedMemory(name=names[0])
@@ -0,0 +1,60 @@
+import pytest
+
+from flet_geolocator.geodesy import (
+    GridIndex,
+    decode_geohash,
+    encode_geohash,
+    haversine_distance,
+)
+
+
+def test_encode_geohash():
+    assert encode_geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert encode_geohash(57.64911, 10.40744, 5) == "u4pru"
+
+
+def test_decode_geohash():
+    latitude, longitude = decode_geohash("u4pruydqqvj")
+    assert latitude == pytest.approx(57.64911, abs=1e-5)
+    assert longitude == pytest.approx(10.40744, abs=1e-5)
+
+
+@pytest.mark.parametrize(
+    "latitude, longitude",
+    [(0, 0), (-33.8688, 151.2093), (89.9, -179.9), (-89.9, 179.9)],
+)
+def test_geohash_round_trip(latitude, longitude):
+    geohash = encode_geohash(latitude, longitude, 9)
+    assert encode_geohash(*decode_geohash(geohash), 9) == geohash
+    assert haversine_distance(latitude, longitude, *decode_geohash(geohash)) < 5
+
+
+def test_geohash_invalid():
+    with pytest.raises(ValueError):
+        encode_geohash(0, 0, 0)
+    with pytest.raises(ValueError):
+        decode_geohash("")
+    with pytest.raises(ValueError):
+        decode_geohash("abc")  # "a" is not in the alphabet
+
+
+def test_haversine_distance():
+    assert haversine_distance(52.2296756, 21.0122287, 52.406374, 16.9251681) == (
+        pytest.approx(278_770, rel=1e-3)
+    )
+    assert haversine_distance(0, 179.99, 0, -179.99) == pytest.approx(2226, rel=1e-3)
+
+
+def test_grid_index_nearest_across_antimeridian():
+    index: GridIndex[str] = GridIndex(1)
+    index.insert("east", 0, 179.5)
+    index.insert("far", 0, 170)
+
+    def distance(item):
+        return haversine_distance(0, -179.5, *points[item])
+
+    points = {"east": (0, 179.5), "far": (0, 170)}
+    item, d = index.nearest(0, -179.5, distance)
+    assert item == "east"
+    assert d == pytest.approx(haversine_distance(0, -179.5, 0, 179.5))
+    assert index.nearest(0, -179.5, distance, max_distance=1000) is None
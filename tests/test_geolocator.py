@@ -0,0 +1,207 @@
+import asyncio
+import datetime
+from types import SimpleNamespace
+
+import flet as ft
+import pytest
+from flet.utils.object_model import patch_dataclass
+
+from flet_geolocator import (
+    Geolocator,
+    GeolocatorPermissionChangeEvent,
+    GeolocatorPermissionStatus,
+    GeolocatorPosition,
+    GeolocatorPositionChangeEvent,
+)
+
+T0 = datetime.datetime(2025, 1, 1, 8, tzinfo=datetime.timezone.utc)
+
+FULL = dict(
+    latitude=52.0,
+    longitude=13.0,
+    speed=1.5,
+    altitude=30.0,
+    timestamp=T0,
+    accuracy=5.0,
+    altitude_accuracy=3.0,
+    heading=90.0,
+    heading_accuracy=10.0,
+    speed_accuracy=0.5,
+    floor=2,
+    mocked=False,
+)
+
+
+@pytest.fixture(autouse=True)
+def detached_update(monkeypatch):
+    # the controls under test are not added to a page
+    monkeypatch.setattr(Geolocator, "update", lambda self: None)
+
+
+class Session:
+    def __init__(self, geolocator: Geolocator):
+        self.index = {geolocator._i: geolocator}
+        self.flushed = []
+
+    async def after_event(self, control):
+        self.flushed.append(control)
+
+
+def attach(geolocator: Geolocator, monkeypatch) -> Session:
+    session = Session(geolocator)
+    page = SimpleNamespace(session=session)
+    monkeypatch.setattr(Geolocator, "page", property(lambda self: page))
+    return session
+
+
+def position_change(
+    geolocator: Geolocator, subscription=None, **kwargs
+) -> GeolocatorPositionChangeEvent:
+    return GeolocatorPositionChangeEvent(
+        name="position_change",
+        control=geolocator,
+        position=GeolocatorPosition(**kwargs),
+        subscription=subscription,
+    )
+
+
+def trigger(geolocator: Geolocator, e: GeolocatorPositionChangeEvent):
+    asyncio.run(geolocator._trigger_event(e.name, None, e))
+
+
+def test_apply_position_delta():
+    previous = GeolocatorPosition(**FULL)
+    delta = GeolocatorPosition(
+        latitude=52.001, timestamp=T0 + datetime.timedelta(seconds=1), floor=None
+    )
+    position = Geolocator._apply_position_delta(previous, delta)
+    assert position == GeolocatorPosition(
+        **{**FULL, "latitude": 52.001, "timestamp": delta.timestamp, "floor": None}
+    )
+    assert Geolocator._apply_position_delta(None, delta) is delta
+
+
+def test_delta_updates_rebuild_position():
+    geolocator = Geolocator(delta_updates=True)
+    geolocator.before_event(position_change(geolocator, **FULL))
+    e = position_change(geolocator, longitude=13.001, floor=2)
+    geolocator.before_event(e)
+
+    assert e.position == GeolocatorPosition(**{**FULL, "longitude": 13.001})
+    assert geolocator.position is e.position
+
+
+def test_delta_updates_dont_mark_position_changed(monkeypatch):
+    geolocator = Geolocator(delta_updates=True)
+    assigned = []
+
+    def setattr_spy(obj, name, value):
+        assigned.append(name)
+        object.__setattr__(obj, name, value)
+
+    monkeypatch.setattr(Geolocator, "__setattr__", setattr_spy)
+    geolocator.before_event(position_change(geolocator, **FULL))
+    geolocator.before_event(position_change(geolocator, latitude=52.1, floor=2))
+
+    assert geolocator.position.latitude == 52.1
+    assert "position" not in assigned
+
+
+def test_subscription_events_go_to_their_handler(monkeypatch):
+    geolocator = Geolocator(delta_updates=True)
+    session = attach(geolocator, monkeypatch)
+    received = []
+    geolocator.on_position_change = lambda e: pytest.fail("not a subscription")
+    geolocator.subscribe("fine", None, received.append)
+
+    e = position_change(geolocator, subscription="fine", **FULL)
+    trigger(geolocator, e)
+    assert received == [e]
+    assert geolocator.position is None
+
+    geolocator.unsubscribe("fine")
+    assert geolocator.subscriptions == []
+    trigger(geolocator, position_change(geolocator, subscription="fine", **FULL))
+    assert len(received) == 1
+    assert session.flushed == [geolocator]
+
+
+def test_resubscribe_keeps_delta_base(monkeypatch):
+    geolocator = Geolocator(delta_updates=True)
+    attach(geolocator, monkeypatch)
+    received = []
+    geolocator.subscribe("fine", None, received.append)
+    trigger(geolocator, position_change(geolocator, subscription="fine", **FULL))
+
+    # a delta from the previous stream may still arrive after re-subscribing
+    geolocator.subscribe("fine", None, received.append, min_interval=5)
+    trigger(
+        geolocator,
+        position_change(geolocator, subscription="fine", speed=2.0, floor=2),
+    )
+
+    assert received[-1].position == GeolocatorPosition(**{**FULL, "speed": 2.0})
+    assert [s.name for s in geolocator.subscriptions] == ["fine"]
+
+
+@pytest.mark.parametrize("kind", ["sync", "no_args", "async", "generator"])
+def test_subscription_handler_changes_are_flushed(kind, monkeypatch):
+    geolocator = Geolocator()
+    session = attach(geolocator, monkeypatch)
+    text = ft.Text()
+    flushed_values = []
+
+    async def after_event(control):
+        # auto-updates the page, sending the changes of the handler
+        flushed_values.append(text.value)
+
+    session.after_event = after_event
+
+    def show(e=None):
+        text.value = "moved"
+
+    async def show_async(e):
+        show(e)
+
+    def show_steps(e):
+        text.value = "moving"
+        yield
+        show(e)
+
+    handler = {
+        "sync": show,
+        "no_args": lambda: show(),
+        "async": show_async,
+        "generator": show_steps,
+    }[kind]
+    geolocator.subscribe("fine", None, handler)
+    trigger(geolocator, position_change(geolocator, subscription="fine", **FULL))
+
+    expected = ["moved"] if kind != "generator" else ["moving", "moved"]
+    assert flushed_values == expected
+
+
+def test_permission_change_event(monkeypatch):
+    geolocator = Geolocator()
+    attach(geolocator, monkeypatch)
+    received = []
+    geolocator.on_permission_change = received.append
+
+    asyncio.run(
+        geolocator._trigger_event("permission_change", {"status": "whileInUse"})
+    )
+    assert len(received) == 1
+    assert isinstance(received[0], GeolocatorPermissionChangeEvent)
+    assert received[0].status is GeolocatorPermissionStatus.WHILE_IN_USE
+
+
+def test_status_properties_patched_by_client():
+    geolocator = Geolocator()
+    assert geolocator.permission_status is None
+    assert geolocator.service_enabled is None
+
+    patch_dataclass(
+        geolocator, {"permission_status": "deniedForever", "service_enabled": True}
+    )
+    assert geolocator.permission_status is GeolocatorPermissionStatus.DENIED_FOREVER
+    assert geolocator.service_enabled is True
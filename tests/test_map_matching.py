@@ -0,0 +1,187 @@
+import asyncio
+import copy
+import json
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from flet_geolocator import GeolocatorPosition, MapMatcher, RoadGraph, analytics
+from flet_geolocator.geodesy import haversine_distance
+from flet_geolocator.map_matching import _Candidate
+
+# about 1.1m of latitude or longitude at the equator
+M = 0.00001
+
+
+def line(way_id, name, *coordinates):
+    return {
+        "type": "Feature",
+        "id": way_id,
+        "properties": {"name": name},
+        "geometry": {
+            "type": "LineString",
+            "coordinates": [[lon, lat] for lat, lon in coordinates],
+        },
+    }
+
+
+def collection(*features):
+    return {"type": "FeatureCollection", "features": list(features)}
+
+
+# a road going east, forking into a northern and a southern branch
+FORK = collection(
+    line(1, "Trunk", (0, 0), (0, 200 * M)),
+    line(2, "North", (0, 200 * M), (30 * M, 400 * M)),
+    line(3, "South", (0, 200 * M), (-30 * M, 400 * M)),
+)
+
+
+def positions(*coordinates) -> list[GeolocatorPosition]:
+    return [GeolocatorPosition(latitude=lat, longitude=lon) for lat, lon in coordinates]
+
+
+def road_names(matches) -> list:
+    return [m.road_name if m is not None else None for m in matches]
+
+
+@pytest.fixture
+def process_pool():
+    analytics.configure_executor(max_workers=1)
+    yield
+    analytics.shutdown_executor()
+    analytics.configure_executor()
+
+
+@pytest.fixture
+def roads_file(tmp_path):
+    path = tmp_path / "roads.geojson"
+    path.write_text(json.dumps(collection(line(1, "Old", (0, 0), (0, 1000 * M)))))
+    return path
+
+
+def test_route_distances():
+    graph = RoadGraph.from_geojson(
+        collection(
+            line(1, "A", (0, 0), (0, 100 * M), (0, 200 * M)),
+            line(2, "B", (1, 0), (1, 100 * M)),  # not connected
+        )
+    )
+    first, second = (graph.edge_lengths[0], graph.edge_lengths[1])
+    source = _Candidate(edge=0, offset=0.5, latitude=0, longitude=0, distance=0)
+    targets = [
+        _Candidate(edge=0, offset=0.25, latitude=0, longitude=0, distance=0),
+        _Candidate(edge=1, offset=0.5, latitude=0, longitude=0, distance=0),
+        _Candidate(edge=2, offset=0.5, latitude=0, longitude=0, distance=0),
+    ]
+
+    distances = graph._route_distances(source, targets, limit=1000)
+    assert distances[0] == pytest.approx(0.25 * first)
+    assert distances[1] == pytest.approx(0.5 * first + 0.5 * second)
+    assert distances[2] == float("inf")
+
+    # routes longer than `limit` are unreachable
+    assert graph._route_distances(source, targets[1:2], limit=0.6 * first) == [
+        float("inf")
+    ]
+
+
+def test_match_backtracks_to_consistent_route():
+    matcher = MapMatcher(RoadGraph.from_geojson(FORK))
+    track = positions(
+        (0, 100 * M),
+        (0, 200 * M),
+        # slightly closer to the northern branch...
+        (1 * M, 250 * M),
+        # ...but the track continues on the southern one
+        (-15 * M, 300 * M),
+        (-22.5 * M, 350 * M),
+        (-30 * M, 400 * M),
+    )
+
+    incremental = [matcher.add(p) for p in track]
+    assert road_names(incremental)[2] == "North"
+
+    matches = matcher.match_track(track)
+    assert road_names(matches)[2:] == ["South"] * 4
+    assert matches[3].distance == pytest.approx(0, abs=0.5)
+
+
+def test_match_restarts_after_unreachable_fix():
+    graph = RoadGraph.from_geojson(
+        collection(
+            line(1, "A", (0, 0), (0, 200 * M)),
+            line(2, "B", (0, 1000 * M), (0, 1200 * M)),  # not connected to A
+        )
+    )
+    track = positions(
+        (1 * M, 0),
+        (1 * M, 100 * M),
+        (1 * M, 200 * M),
+        (1 * M, 600 * M),  # no road within the search radius
+        (1 * M, 1000 * M),
+        (1 * M, 1100 * M),
+    )
+    matches = MapMatcher(graph).match_track(track)
+    assert road_names(matches) == ["A", "A", "A", None, "B", "B"]
+    assert matches[1].latitude == pytest.approx(0, abs=1e-9)
+    assert haversine_distance(
+        matches[1].latitude, matches[1].longitude, 0, 100 * M
+    ) == pytest.approx(0, abs=0.01)
+
+
+def test_graph_mutation_clears_source(roads_file):
+    graph = RoadGraph.from_geojson(roads_file)
+    assert graph._source is not None
+    graph.add_node("existing", 0, 0)
+    assert graph._source is None
+
+
+def test_copy_and_pickle_keep_graph(roads_file):
+    graph = RoadGraph.from_geojson(roads_file)
+    os.remove(roads_file)
+
+    for clone in (copy.deepcopy(graph), pickle.loads(pickle.dumps(graph))):
+        assert clone.edge_count == graph.edge_count
+        assert clone.ways == graph.ways
+
+    clone = copy.deepcopy(graph)
+    clone.add_way([clone.add_node("a", 1, 1), clone.add_node("b", 1, 2)], 2, "New")
+    assert graph.edge_count == 1
+
+
+@pytest.mark.parametrize("change", ["mutate", "edit", "remove", None])
+def test_async_matches_sync(change, roads_file, process_pool):
+    graph = RoadGraph.from_geojson(roads_file)
+    track = positions((1 * M, 100 * M), (1 * M, 200 * M), (1 * M, 300 * M))
+
+    if change == "mutate":
+        start = graph.add_node("new-start", 1 * M, 0)
+        end = graph.add_node("new-end", 1 * M, 1000 * M)
+        graph.add_way([start, end], 2, "New")
+    elif change == "edit":
+        roads_file.write_text(
+            json.dumps(collection(line(1, "Edited", (0, 0), (0, 1000 * M))))
+        )
+    elif change == "remove":
+        os.remove(roads_file)
+
+    matcher = MapMatcher(graph)
+    expected = matcher.match_track(track)
+    assert road_names(expected) == ["New" if change == "mutate" else "Old"] * 3
+    assert asyncio.run(matcher.match_track_async(track)) == expected
+
+
+def test_async_matches_sync_in_threads(roads_file):
+    matcher = MapMatcher(RoadGraph.from_geojson(roads_file))
+    track = positions((1 * M, 100 * M), (1 * M, 200 * M))
+    with ThreadPoolExecutor(1) as executor:
+        analytics.configure_executor(executor)
+        try:
+            assert asyncio.run(matcher.match_track_async(track)) == (
+                matcher.match_track(track)
+            )
+        finally:
+            analytics.configure_executor()
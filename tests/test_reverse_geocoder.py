@@ -0,0 +1,112 @@
+import zipfile
+
+import pytest
+
+from flet_geolocator import GeolocatorPlace, ReverseGeocoder
+from flet_geolocator.geodesy import decode_geohash, encode_geohash
+
+PLACES = [
+    GeolocatorPlace(name="Berlin", latitude=52.52437, longitude=13.41053),
+    GeolocatorPlace(name="Potsdam", latitude=52.39886, longitude=13.06566),
+    GeolocatorPlace(name="Suva", latitude=-18.14161, longitude=178.44149),
+    GeolocatorPlace(name="Apia", latitude=-13.83333, longitude=-171.76666),
+]
+
+
+def test_lookup_nearest():
+    geocoder = ReverseGeocoder(PLACES)
+    assert geocoder.lookup_coordinates(52.5, 13.4).name == "Berlin"
+    assert geocoder.lookup_coordinates(52.4, 13.1).name == "Potsdam"
+
+
+def test_lookup_across_antimeridian():
+    geocoder = ReverseGeocoder(PLACES)
+    # closer to Suva through the antimeridian than to Apia
+    assert geocoder.lookup_coordinates(-18.0, -179.5).name == "Suva"
+    assert geocoder.lookup_coordinates(-14.0, -173.0).name == "Apia"
+
+
+def test_max_distance_uses_exact_coordinate():
+    place = GeolocatorPlace(name="Center", latitude=0, longitude=0)
+    # a coarse cell: the center of the cell is kilometers away from the fix
+    geocoder = ReverseGeocoder([place], geohash_precision=3, max_distance=1000)
+    center_latitude, center_longitude = decode_geohash(encode_geohash(0.001, 0.001, 3))
+    assert (center_latitude, center_longitude) != pytest.approx((0, 0), abs=0.1)
+
+    assert geocoder.lookup_coordinates(0.001, 0.001) is place
+    # same cell, but too far from the place
+    assert geocoder.lookup_coordinates(0.5, 0.5) is None
+    assert encode_geohash(0.5, 0.5, 3) == encode_geohash(0.001, 0.001, 3)
+
+
+def test_max_distance_finds_place_hidden_by_cell_center():
+    key = encode_geohash(52.5, 13.4, 5)
+    center_latitude, center_longitude = decode_geohash(key)
+    # a fix near the corner of the cell, with one place next to it and
+    # another, farther one next to the center of the cell
+    latitude, longitude = center_latitude + 0.02, center_longitude + 0.02
+    near = GeolocatorPlace(
+        name="Near", latitude=latitude + 0.0005, longitude=longitude + 0.0005
+    )
+    central = GeolocatorPlace(
+        name="Central", latitude=center_latitude, longitude=center_longitude + 0.005
+    )
+    geocoder = ReverseGeocoder([near, central], geohash_precision=5, max_distance=200)
+    assert encode_geohash(latitude, longitude, 5) == key
+
+    assert geocoder.lookup_coordinates(latitude, longitude) is near
+    # also once the cell is cached
+    assert geocoder.lookup_coordinates(latitude, longitude) is near
+
+
+def test_cache_lru_eviction():
+    geocoder = ReverseGeocoder(PLACES, cache_size=2)
+    berlin, potsdam, suva = (52.52, 13.41), (52.39, 13.06), (-18.14, 178.44)
+
+    geocoder.lookup_coordinates(*berlin)
+    geocoder.lookup_coordinates(*potsdam)
+    geocoder.lookup_coordinates(*berlin)  # Berlin is now the most recently used
+    geocoder.lookup_coordinates(*suva)  # evicts Potsdam
+    assert geocoder.cache_info() == {"hits": 1, "misses": 3, "size": 2, "max_size": 2}
+
+    geocoder.lookup_coordinates(*berlin)
+    assert geocoder.cache_info()["hits"] == 2
+    geocoder.lookup_coordinates(*potsdam)
+    assert geocoder.cache_info()["misses"] == 4
+
+    geocoder.clear_cache()
+    assert geocoder.cache_info() == {"hits": 0, "misses": 0, "size": 0, "max_size": 2}
+
+
+def test_cache_disabled():
+    geocoder = ReverseGeocoder(PLACES, cache_size=0)
+    geocoder.lookup_coordinates(52.52, 13.41)
+    geocoder.lookup_coordinates(52.52, 13.41)
+    assert geocoder.cache_info() == {"hits": 0, "misses": 2, "size": 0, "max_size": 0}
+
+
+def test_from_geonames_zip(tmp_path):
+    (tmp_path / "cities.txt").write_text(
+        "1\tBerlin\tBerlin\t\t52.52437\t13.41053\tP\tPPLC\tDE\t\t16\t00\t\t\t"
+        "3426354\t\t74\tEurope/Berlin\t2022\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "admin1.txt").write_text("DE.16\tBerlin\tBerlin\t1\n", encoding="utf-8")
+    with zipfile.ZipFile(tmp_path / "cities.zip", "w") as archive:
+        archive.write(tmp_path / "cities.txt", "cities.txt")
+
+    geocoder = ReverseGeocoder.from_geonames(
+        tmp_path / "cities.zip", admin1_codes_path=tmp_path / "admin1.txt"
+    )
+    place = geocoder.lookup_coordinates(52.5, 13.4)
+    assert place.name == "Berlin"
+    assert place.region == "Berlin"
+    assert place.population == 3426354
+    assert place.timezone == "Europe/Berlin"
+
+
+def test_from_geonames_zip_without_txt(tmp_path):
+    with zipfile.ZipFile(tmp_path / "cities.zip", "w") as archive:
+        archive.writestr("readme.md", "")
+    with pytest.raises(ValueError, match="no .txt file"):
+        ReverseGeocoder.from_geonames(tmp_path / "cities.zip")
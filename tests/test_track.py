@@ -0,0 +1,172 @@
+import datetime
+
+import pytest
+
+from flet_geolocator import GeolocatorPosition, TrackSegmenter
+
+T0 = datetime.datetime(2025, 1, 1, 8, tzinfo=datetime.timezone.utc)
+
+# about 111m of latitude
+STEP = 0.001
+
+
+def minutes(n: float) -> datetime.datetime:
+    return T0 + datetime.timedelta(minutes=n)
+
+
+class Recorder:
+    def __init__(self, **kwargs):
+        self.events = []
+        self.segmenter = TrackSegmenter(
+            radius=50,
+            min_duration=datetime.timedelta(minutes=5),
+            on_stay_start=lambda stay: self.events.append(("stay_start", stay)),
+            on_stay_end=lambda stay: self.events.append(("stay_end", stay)),
+            on_trip_end=lambda trip: self.events.append(("trip", trip)),
+            **kwargs,
+        )
+
+    def add(self, fixes):
+        for latitude, timestamp in fixes:
+            self.segmenter.add_coordinates(latitude, 13.0, timestamp)
+
+    @property
+    def kinds(self) -> list[str]:
+        return [kind for kind, _ in self.events]
+
+
+def stay(latitude: float, start: float, end: float):
+    # one fix per minute with a few meters of jitter
+    return [
+        (latitude + (i % 2) * 1e-5, minutes(start + i))
+        for i in range(int(end - start) + 1)
+    ]
+
+
+def travel(start_latitude: float, start: float, fixes: int):
+    return [(start_latitude + i * STEP, minutes(start + i)) for i in range(1, fixes)]
+
+
+def test_stay_trip_stay():
+    recorder = Recorder()
+    recorder.add(stay(52.0, 0, 10))
+    recorder.add(travel(52.0, 10, 10))
+    recorder.add(stay(52.01, 20, 26))
+    recorder.segmenter.finish()
+
+    assert recorder.kinds == [
+        "stay_start",
+        "stay_end",
+        "trip",
+        "stay_start",
+        "stay_end",
+    ]
+    first_stay = recorder.events[1][1]
+    assert first_stay.start == minutes(0)
+    assert first_stay.end == minutes(10)
+    assert first_stay.latitude == pytest.approx(52.0, abs=1e-4)
+
+    trip = recorder.events[2][1]
+    assert trip.start == minutes(10)
+    assert trip.end == minutes(20)
+    assert trip.start_latitude == pytest.approx(52.0, abs=1e-4)
+    assert trip.end_latitude == pytest.approx(52.01)
+    assert trip.distance == pytest.approx(1113, rel=0.01)
+
+    second_stay = recorder.events[4][1]
+    assert second_stay.start == minutes(20)
+    assert second_stay.end == minutes(26)
+
+
+def test_outliers_do_not_end_stay():
+    recorder = Recorder()
+    recorder.add(stay(52.0, 0, 10))
+    # two isolated jumps of about 500m
+    recorder.add([(52.0045, minutes(10.5))])
+    recorder.add(stay(52.0, 11, 13))
+    recorder.add([(52.0045, minutes(13.5)), (52.0046, minutes(13.7))])
+    recorder.add(stay(52.0, 14, 20))
+    recorder.segmenter.finish()
+
+    assert recorder.kinds == ["stay_start", "stay_end"]
+    assert recorder.events[1][1].start == minutes(0)
+    assert recorder.events[1][1].end == minutes(20)
+
+
+def test_min_exit_fixes_one_ends_stay_on_first_outlier():
+    recorder = Recorder(min_exit_fixes=1)
+    recorder.add(stay(52.0, 0, 10))
+    recorder.add([(52.0045, minutes(10.5))])
+    assert recorder.kinds == ["stay_start", "stay_end"]
+    assert recorder.events[1][1].end == minutes(10)
+
+
+def test_exit_fixes_start_the_trip():
+    recorder = Recorder()
+    recorder.add(stay(52.0, 0, 10))
+    recorder.add(travel(52.0, 10, 4))  # three fixes outside of the stay
+    assert recorder.kinds == ["stay_start", "stay_end"]
+
+    recorder.segmenter.finish()
+    assert recorder.kinds == ["stay_start", "stay_end", "trip"]
+    trip = recorder.events[2][1]
+    assert trip.start == minutes(10)
+    assert trip.end == minutes(13)
+    assert trip.fix_count == 4
+    assert trip.distance == pytest.approx(3 * 111.3, rel=0.01)
+
+
+def test_finish_during_trip():
+    recorder = Recorder()
+    recorder.add(travel(52.0, 0, 6))
+    assert recorder.kinds == []
+    assert recorder.segmenter.current_stay is None
+
+    recorder.segmenter.finish()
+    assert recorder.kinds == ["trip"]
+    trip = recorder.events[0][1]
+    assert trip.start == minutes(1)
+    assert trip.end == minutes(5)
+    assert trip.fix_count == 5
+
+    # the segmenter is reset
+    recorder.segmenter.finish()
+    assert recorder.kinds == ["trip"]
+
+
+def test_out_of_order_fixes_are_ignored():
+    recorder = Recorder()
+    recorder.add(stay(52.0, 0, 10))
+    recorder.add([(52.5, minutes(3))])  # late fix far away
+    assert recorder.segmenter.current_stay.fix_count == 11
+
+    recorder.add(travel(52.0, 10, 3))  # two fixes outside of the stay
+    recorder.add([(52.5, minutes(11.5))])  # older than the last exit fix
+    recorder.add(stay(52.0, 13, 14))
+    assert recorder.kinds == ["stay_start"]
+    assert recorder.segmenter.current_stay.end == minutes(14)
+
+
+def test_stay_across_antimeridian():
+    recorder = Recorder()
+    for i in range(11):
+        longitude = 179.9998 if i % 2 else -179.9998
+        recorder.segmenter.add_coordinates(-16.5, longitude, minutes(i))
+    recorder.segmenter.finish()
+
+    assert recorder.kinds == ["stay_start", "stay_end"]
+    point = recorder.events[1][1]
+    assert point.fix_count == 11
+    assert abs(point.longitude) == pytest.approx(180, abs=1e-3)
+
+
+def test_add_requires_timestamp():
+    with pytest.raises(ValueError):
+        TrackSegmenter().add(GeolocatorPosition(latitude=52.0, longitude=13.0))
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        TrackSegmenter(radius=0)
+    with pytest.raises(ValueError):
+        TrackSegmenter(min_exit_fixes=0)